@@ -1,41 +1,665 @@
 import os
+import sys
 from pathlib import Path
 import platform
 import pandas as pd
 import functools
+import bisect
+import hashlib
+import json
 from datetime import datetime
 import numpy as np
-import networkx as nx
-from operator import and_
-import requests
-import plotly.graph_objects as go
-import chart_studio.plotly as py
-import plotly
-import git
-import platform
-from bs4 import BeautifulSoup
 import itertools
 import re
+import logging
+from typing import NamedTuple
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import io
+import contextlib
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler()) #quiet unless the caller configures logging
+
+
+class _StderrHandler(logging.StreamHandler):
+    # writes to the current sys.stderr, which notebooks and test runners replace
+    def emit(self, record):
+        self.stream = sys.stderr
+        super().emit(record)
+
+
+# instances created with verbose=True log INFO to stderr here, leaving `logger` untouched
+_verbose_logger = logger.getChild("verbose")
+_verbose_logger.setLevel(logging.INFO)
+_verbose_logger.addHandler(_StderrHandler())
+_verbose_logger.propagate = False
+
+# networkx, requests, bs4, plotly and git are imported by the features that use them, so the
+# lookups only need pandas and numpy (see `import_time` in benchmarks.py)
+
+
+def _is_url(source):
+    return str(source).startswith(("http://", "https://"))
+
+
+def _write_atomic(path, write):
+    # `write(f)` goes to a unique file next to `path`, renamed over it once complete, so
+    # concurrent writers never share a temporary file and readers never see a partial one
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name+".", suffix=".tmp", delete=False)
+    try:
+        with f:
+            write(f)
+        os.replace(f.name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(f.name)
+        raise
+
+
+def _to_code(position, digits=6):
+    # exact code as int, -1 when `position` is not a string of `digits` digits
+    return int(position) if isinstance(position, str) and re.fullmatch("\\d{%d}" % digits, position) else -1
+
+
+def _tokens(text):
+    # lowercase words with the plural heuristic of the old regex search ("s?", "es?") folded in,
+    # unique and in order of appearance
+    tokens = {}
+    for token in re.findall("[a-z0-9]+", str(text).lower()):
+        if len(token)>3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        if len(token)>3 and token.endswith('e'):
+            token = token[:-1]
+        tokens[token] = None
+    return list(tokens)
+
+
+@functools.lru_cache(maxsize=16)
+def _read_descriptions(path):
+    # shared by every instance, so each classification file is parsed once per process
+    with open(path, encoding='utf-8') as f:
+        df = pd.DataFrame(json.load(f)['results'])
+    return df, dict(zip(df.id, df.text))
+
+
+def _component_labels(u, v, n_nodes):
+    # min-label propagation with pointer jumping; every label is the smallest node id of its component
+    labels = np.arange(n_nodes)
+    while True:
+        m = np.minimum(labels[u], labels[v])
+        new = labels.copy()
+        np.minimum.at(new, u, m)
+        np.minimum.at(new, v, m)
+        new = new[new]
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def _resolve(index, positions, level=6):
+    # body of `HSCorrelations.find_homogeneous_series`, shared with the process pool workers
+    versions = index.versions
+    positions = pd.Series(np.asarray(positions, dtype=object)).astype(str)
+    # same rule as `_to_code`: HS6 positions (or longer prefixes of a heading or chapter)
+    valid = positions.str.fullmatch("\\d{%d,6}" % level).to_numpy()
+    positions = positions.where(~valid, positions.str[:level])
+    codes = np.where(valid, pd.to_numeric(positions.where(valid, "-1")), -1).astype('int64')
+    # node of the position in every version of the period, -1 where it does not exist
+    all_nodes = np.column_stack([index.lookup(v, codes) for v in versions])
+    start, end = index.windows()
+    found = (all_nodes>=0).any(axis=1)
+    rows = np.arange(len(codes))
+    nodes = all_nodes[rows, len(versions)-1-np.argmax(all_nodes[:, ::-1]>=0, axis=1)]
+    # longest 1:1 window through any of its nodes, the latest one on ties
+    lengths = np.where(all_nodes>=0, end[all_nodes]-start[all_nodes], -1)
+    best = all_nodes[rows, len(versions)-1-np.argmax(lengths[:, ::-1], axis=1)]
+    names = pd.Series(versions)
+    result = pd.DataFrame({'position': positions,
+                           'version': names.reindex(np.where(found, index.keys[nodes]//1_000_000, -1)).to_numpy(),
+                           'component': np.where(found, index.labels[nodes], -1)})
+    result = result.join(index.member_table(), on='component')
+    result['no_loss_from'] = names.reindex(np.where(found, start[best], -1)).to_numpy()
+    result['no_loss_to'] = names.reindex(np.where(found, end[best], -1)).to_numpy()
+    return result
+
+
+_worker = {}
+
+
+def _init_worker(path, versions):
+    # the code table is mapped read-only, so every worker shares the same page-cached copy
+    _worker['codes'] = np.load(path, mmap_mode='r')
+    _worker['versions'] = versions
+    _worker['indexes'] = {}
+
+
+def _resolve_task(task):
+    cols, positions, level = task
+    if (cols, level) not in _worker['indexes']:
+        idx = [_worker['versions'].index(col) for col in cols]
+        _worker['indexes'][cols, level] = _ComponentIndex(cols, _worker['codes'][:, idx]//10**(6-level), level)
+    return _resolve(_worker['indexes'][cols, level], positions, level)
+
+
+class _ComponentIndex:
+    """Connected components of the correlation graph for a fixed list of versions.
+
+    Nodes are integer-encoded as version_index*1_000_000 + code and rows of `codes`
+    (one column per version) link the codes of consecutive versions. Codes have `digits`
+    digits: 6 for HS6 positions, 4 for headings and 2 for chapters."""
+
+    def __init__(self, versions, codes, digits=6):
+        self.versions = list(versions)
+        self.digits = digits
+        codes = np.unique(np.asarray(codes, dtype=np.int64), axis=0)
+        keys = codes + np.arange(len(self.versions), dtype=np.int64)*1_000_000
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.reshape(keys.shape)
+        u = inverse[:, :-1].ravel()
+        v = inverse[:, 1:].ravel()
+        self.edges = np.unique(np.stack([u, v], axis=1), axis=0)
+        roots = _component_labels(u, v, len(self.keys))
+        _, self.labels = np.unique(roots, return_inverse=True)
+        self.order = np.argsort(self.labels, kind='stable')
+        self.bounds = np.searchsorted(self.labels[self.order], np.arange(self.labels.max()+2))
+        self.node_ids = dict(zip(self.keys.tolist(), range(len(self.keys))))
+        self.__windows = None
+        self.__members = None
+
+    def __len__(self):
+        return len(self.bounds)-1
+
+    def component(self, version, code):
+        node = self.node_ids.get(self.versions.index(version)*1_000_000 + int(code))
+        return -1 if node is None else int(self.labels[node])
+
+    def members(self, component):
+        keys = self.keys[self.order[self.bounds[component]:self.bounds[component+1]]]
+        return [(self.versions[k//1_000_000], str(k%1_000_000).zfill(self.digits)) for k in keys.tolist()]
+
+    def lookup(self, version, codes):
+        # node ids for an array of codes of one version, -1 when missing or not a code
+        codes = np.asarray(codes, dtype=np.int64)
+        valid = (codes>=0)&(codes<1_000_000)
+        keys = self.versions.index(version)*1_000_000 + np.where(valid, codes, 0)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys)-1)
+        return np.where(valid&(self.keys[pos]==keys), pos, -1)
+
+    def nodes(self):
+        return pd.DataFrame({'component': self.labels,
+                             'version': np.asarray(self.versions)[self.keys//1_000_000],
+                             'code': pd.Series(self.keys%1_000_000).astype(str).str.zfill(self.digits)})
+
+    def member_table(self):
+        # member codes of every component, one list per version (NaN where it has none)
+        if self.__members is None:
+            labels, version = self.labels[self.order], self.keys[self.order]//1_000_000
+            codes = pd.Series(self.keys[self.order]%1_000_000).astype(str).str.zfill(self.digits).to_numpy()
+            starts = np.flatnonzero(np.r_[True, (labels[1:]!=labels[:-1])|(version[1:]!=version[:-1])])
+            groups = pd.DataFrame({'component': labels[starts],
+                                   'version': np.asarray(self.versions)[version[starts]],
+                                   'code': [g.tolist() for g in np.split(codes, starts[1:])]})
+            self.__members = groups.pivot(index='component', columns='version', values='code').reindex(columns=self.versions)
+        return self.__members
+
+    def windows(self):
+        # first and last version index of the longest run of 1:1 links through every node
+        if self.__windows is None:
+            u, v = self.edges[:, 0], self.edges[:, 1]
+            n = len(self.keys)
+            one_to_one = (np.bincount(u, minlength=n)[u]==1)&(np.bincount(v, minlength=n)[v]==1)
+            nxt, prev = np.full(n, -1), np.full(n, -1)
+            nxt[u[one_to_one]] = v[one_to_one]
+            prev[v[one_to_one]] = u[one_to_one]
+            version = self.keys//1_000_000
+            start, end = version.copy(), version.copy()
+            for i in range(1, len(self.versions)):
+                linked = np.flatnonzero((version==i)&(prev>=0))
+                start[linked] = start[prev[linked]]
+            for i in range(len(self.versions)-2, -1, -1):
+                linked = np.flatnonzero((version==i)&(nxt>=0))
+                end[linked] = end[nxt[linked]]
+            self.__windows = start, end
+        return self.__windows
+
+    def metrics(self):
+        # size and codes per version of the component of every node, and its fan-in/fan-out
+        n = len(self.keys)
+        per_version = np.zeros((self.labels.max()+1, len(self.versions)), dtype=np.int64)
+        np.add.at(per_version, (self.labels, self.keys//1_000_000), 1)
+        return (np.diff(self.bounds)[self.labels], per_version[self.labels],
+                np.bincount(self.edges[:, 1], minlength=n), np.bincount(self.edges[:, 0], minlength=n))
+
+
+class Stats:
+    """Opt-in timers and counters, enabled with `HSCorrelations(..., stats=Stats())`.
+
+    Public methods marked `@_timed` are timed under their name and internal phases under
+    `load`, `index_build`, `graph_build`, `component_search`, `render` and `fetch`; caches
+    count `<cache>.hit` and `<cache>.miss`. `profiler` is any object with enable()/disable(),
+    e.g. `cProfile.Profile()`, switched on around the outermost timed call of one thread at a
+    time and never touched from the others. Any other object with the same `timer(name)` and
+    `count(name, n)` methods can be passed as a custom collector."""
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self.timers = {} #name -> [calls, total seconds, max seconds]
+        self.counters = {}
+        self.__local = threading.local() #nesting depth per thread, fetches are timed from worker threads
+        self.__lock = threading.Lock()
+        self.__profiling = None #thread running the profiler
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        depth = getattr(self.__local, 'depth', 0)
+        self.__local.depth = depth+1
+        profiling = False
+        if depth==0 and self.profiler is not None:
+            with self.__lock:
+                profiling = self.__profiling is None
+                if profiling:
+                    self.__profiling = threading.get_ident()
+            if profiling:
+                self.profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter()-start
+            self.__local.depth = depth
+            if profiling:
+                self.profiler.disable()
+            with self.__lock:
+                if profiling:
+                    self.__profiling = None
+                timer = self.timers.setdefault(name, [0, 0.0, 0.0])
+                timer[0] += 1
+                timer[1] += elapsed
+                timer[2] = max(timer[2], elapsed)
+
+    def count(self, name, n=1):
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0)+n
+
+    def reset(self):
+        with self.__lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def to_dict(self):
+        with self.__lock:
+            return {'timers': {name: {'calls': calls, 'total_s': total, 'mean_ms': total/calls*1e3, 'max_ms': top*1e3}
+                               for name, (calls, total, top) in sorted(self.timers.items())},
+                    'counters': dict(sorted(self.counters.items()))}
+
+    def to_json(self, path=None):
+        text = json.dumps(self.to_dict(), indent=2)
+        if path:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+
+_NO_TIMER = contextlib.nullcontext()
+
+
+def _timer(stats, name):
+    return stats.timer(name) if stats is not None else _NO_TIMER
+
+
+def _hit(stats, cache, hit):
+    if stats is not None:
+        stats.count(f"{cache}.hit" if hit else f"{cache}.miss")
+
+
+def _timed(method):
+    # times a public method under its name when the instance has a collector
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.stats is None:
+            return method(self, *args, **kwargs)
+        with self.stats.timer(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class Fetcher:
+    """Shared HTTP layer for every remote download.
+
+    One pooled `requests.Session` with bounded retries (backoff on connection errors and
+    429/5xx answers) and a timeout. Responses are cached in `cache_dir` with their ETag and
+    Last-Modified headers, later requests are conditional and a 304 (or a network failure)
+    serves the cached copy. `get_many` downloads several URLs concurrently."""
+
+    headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/47.0.2526.106 Safari/537.36'}
+
+    def __init__(self, cache_dir=None, timeout=60, retries=3, backoff=0.5, max_workers=6, stats=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.stats = stats
+        self.__session = None
+        self.__lock = threading.Lock()
+
+    @property
+    def session(self):
+        # requests is imported and the session built on the first download
+        with self.__lock:
+            if self.__session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util import Retry
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(pool_maxsize=self.max_workers,
+                                      max_retries=Retry(total=self.retries, backoff_factor=self.backoff,
+                                                        status_forcelist=[429, 500, 502, 503, 504]))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.__session = session
+        return self.__session
+
+    def __paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()[:24]
+        return self.cache_dir/f"{key}.body", self.cache_dir/f"{key}.json"
+
+    def get(self, url):
+        with _timer(self.stats, 'fetch'):
+            return self.__get(url)
+
+    def __get(self, url):
+        import requests
+        body, meta = self.__paths(url) if self.cache_dir else (None, None)
+        headers = {}
+        if body and body.exists() and meta.exists():
+            with open(meta) as f:
+                validators = json.load(f)
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+        try:
+            r = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            if body and body.exists():
+                logger.warning("Could not reach %s, using the cached copy", url)
+                _hit(self.stats, 'http', True)
+                return body.read_bytes()
+            raise
+        _hit(self.stats, 'http', r.status_code==304)
+        if r.status_code==304:
+            return body.read_bytes()
+        r.raise_for_status()
+        if body:
+            validators = {'url': url, 'etag': r.headers.get('ETag'), 'last_modified': r.headers.get('Last-Modified')}
+            try:
+                _write_atomic(body, lambda f: f.write(r.content))
+                _write_atomic(meta, lambda f: f.write(json.dumps(validators).encode()))
+            except OSError as e:
+                logger.warning("Could not cache %s: %s", url, e)
+        return r.content
+
+    def get_many(self, urls):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self.get, urls))
+
+
+class TradeOff(NamedTuple):
+    """Window of versions over which a position keeps its definition (no precision loss)."""
+    position: str
+    start: str
+    end: str
+    years: str
+    members: list
+    precision_loss: bool #True when the position exists in versions outside the window
+
+
+class CorrelationGraph:
+    """Read-only correlation graph written by `HSCorrelations.save_graph`.
+
+    The node table (sorted version_index*1_000_000 + code keys), the CSR adjacency
+    (indptr/indices of int32 node ids) and the component labels over all versions (with
+    nodes grouped by component in order/bounds) are
+    memory-mapped, so processes opening the same directory share one page-cached copy and
+    queries run on the arrays without building networkx objects."""
+
+    def __init__(self, directory):
+        directory = Path(directory)
+        with open(directory/"versions.json") as f:
+            meta = json.load(f)
+        self.versions, self.digits = meta['versions'], meta['digits']
+        self.keys, self.indptr, self.indices, self.labels, self.order, self.bounds = [
+            np.load(directory/f"{name}.npy", mmap_mode='r') for name in ('keys', 'indptr', 'indices', 'labels', 'order', 'bounds')]
+
+    def node(self, version, code):
+        key = self.versions.index(version)*1_000_000 + int(code)
+        i = np.searchsorted(self.keys, key)
+        return int(i) if i<len(self.keys) and self.keys[i]==key else -1
+
+    def __names(self, nodes):
+        keys = np.asarray(self.keys[nodes], dtype=np.int64)
+        return sorted(f"{self.versions[k//1_000_000]}-{str(k%1_000_000).zfill(self.digits)}" for k in keys.tolist())
+
+    def neighbours(self, version, code):
+        node = self.node(version, code)
+        if node<0:
+            return []
+        return self.__names(self.indices[self.indptr[node]:self.indptr[node+1]])
+
+    def component(self, version, code, versions=None):
+        """Members of the component of a node, like `find_homogeneous_serie`; with `versions`
+        the graph is restricted to those (consecutive) versions, which must include `version`."""
+        node = self.node(version, code)
+        if node<0 or (versions is not None and version not in versions):
+            return None
+        if versions is None:
+            label = self.labels[node]
+            return self.__names(self.order[self.bounds[label]:self.bounds[label+1]])
+        allowed = np.isin(np.arange(len(self.versions)), [self.versions.index(v) for v in versions])
+        seen = {node}
+        frontier = np.array([node])
+        while len(frontier):
+            nxt = np.concatenate([self.indices[self.indptr[n]:self.indptr[n+1]] for n in frontier.tolist()])
+            nxt = np.unique(nxt[allowed[self.keys[nxt]//1_000_000]])
+            frontier = np.array([n for n in nxt.tolist() if n not in seen], dtype=np.int64)
+            seen.update(frontier.tolist())
+        return self.__names(np.array(list(seen)))
 
 
 class HSCorrelations: 
+
+    stats = None #`Stats` collector, timing is off when None
     
-    def __init__(self, path=None):
-        self.__HS = {'HS92':'H0', 'HS96':'H1', 'HS02':'H2', 'HS07':'H3', 'HS12':'H4', 'HS17':'H5'} #should be updated if changed 
-        print(f"Loading HS Correlation Tables from path provided")
-        if path: 
-            self.__data = pd.read_excel(path,
-                            usecols= self.__HS.keys(),
-                            dtype = {v:'object' for v in self.__HS.keys()}).dropna().drop_duplicates()
-        else:
-            print("Loading HS Correlation Tables from UNSTATS\n server")
+    def __init__(self, path=None, cache_dir=None, use_cache=True, refresh=False, descriptions_dir=None,
+                 conversion_source=None, verbose=False, fetcher=None,
+                 comtrade_url="https://comtrade.un.org/data/cache/", stats=None):
+        self.__logger = _verbose_logger if verbose else logger
+        self.__HS = {'HS92':'H0', 'HS96':'H1', 'HS02':'H2', 'HS07':'H3', 'HS12':'H4', 'HS17':'H5'} #should be updated if changed, see `add_version()` 
+        self.__years = {'HS92':1992, 'HS96':1996, 'HS02':2002, 'HS07':2007, 'HS12':2012, 'HS17':2017}
+        self.__cache_dir = Path(cache_dir) if cache_dir else Path.home()/".cache"/"HSCorrelations"
+        self.__descriptions_dir = Path(descriptions_dir) if descriptions_dir else self.__cache_dir/"descriptions"
+        self.stats = stats
+        self.__fetcher = fetcher if fetcher else Fetcher(cache_dir=self.__cache_dir/"http", stats=stats)
+        self.__comtrade_url = comtrade_url
+        if not path:
             self.__url = "https://unstats.un.org/unsd/trade/classifications/tables/CompleteCorrelationsOfHS-SITC-BEC_20170606.xlsx"
-            self.__data = pd.read_excel(self.__url,
+        cache_file = self.__cache_file(path if path else self.__url) if use_cache else None
+        if cache_file:
+            _hit(stats, 'correlations', cache_file.exists() and not refresh)
+        with _timer(stats, 'load'):
+            if cache_file and cache_file.exists() and not refresh:
+                self.__logger.info("Loading HS Correlation Tables from cache")
+                codes = self.__read_cache(cache_file)
+            elif path: 
+                self.__logger.info("Loading HS Correlation Tables from path provided")
+                codes = pd.read_excel(io.BytesIO(self.__fetcher.get(path)) if _is_url(path) else path,
                                 usecols= self.__HS.keys(),
-                                dtype = {v:'object' for v in self.__HS.keys()}).dropna().drop_duplicates()
-        print("Tables already loaded. Use `available_methods()` for more information\n")
-        self.__url_base = "https://unstats.un.org/unsd/trade/classifications/"
+                                dtype = {v:'object' for v in self.__HS.keys()}).dropna().drop_duplicates()[list(self.__HS)].astype('int32').to_numpy()
+            else:
+                self.__logger.info("Loading HS Correlation Tables from UNSTATS server")
+                codes = pd.read_excel(io.BytesIO(self.__fetcher.get(self.__url)),
+                                    usecols= self.__HS.keys(),
+                                    dtype = {v:'object' for v in self.__HS.keys()}).dropna().drop_duplicates()[list(self.__HS)].astype('int32').to_numpy()
+        with _timer(stats, 'index_build'):
+            self.__set_codes(codes)
+        if cache_file and (refresh or not cache_file.exists()):
+            self.__write_cache(cache_file)
+        self.__logger.info("Tables already loaded. Use `available_methods()` for more information")
+        #conversion tables come from UNSTATS or from a local directory laid out like it
+        self.__url_base = conversion_source if conversion_source else "https://unstats.un.org/unsd/trade/classifications/"
         self.__url_suffix = "correspondence-tables.asp" 
+        self.__conversion_links = None
+        self.__conversions = {} #(from_year, to_year) -> parsed conversion table
+        self.__components = {} #component index per version window, built on first use
+        self.__precision = {} #(version windows, level) -> precision-loss metrics
+        self.__text_index = None #token -> encoded (version, code) postings, built on first search
+
+    def __cache_file(self, source):
+        # keyed on the content of local files and on the address of remote ones
+        if os.path.isfile(source):
+            with open(source, 'rb') as f:
+                key = hashlib.sha256(f.read()).hexdigest()
+        else:
+            key = hashlib.sha256(str(source).encode()).hexdigest()
+        return self.__cache_dir/f"correlations-{key[:16]}.npz"
+
+    def __read_cache(self, cache_file):
+        with np.load(cache_file) as npz:
+            return npz['codes']
+
+    def __write_cache(self, cache_file):
+        try:
+            _write_atomic(cache_file, lambda f: np.savez(f, codes=self.__codes, versions=np.array(list(self.__HS))))
+        except OSError as e:
+            self.__logger.warning("Could not write the cache %s: %s", cache_file, e)
+
+    def __set_codes(self, codes):
+        # int32 HS6 codes (one column per version) back every lookup; `self.__data` is a view of
+        # the same table as categoricals sharing a single list of zero-padded codes
+        self.__codes = np.ascontiguousarray(codes, dtype=np.int32)
+        self.__sorted_codes = {}
+        self.__rows = {} #(row numbers sorted by code, start of each code) per version
+        for v in self.__HS:
+            self.__index_version(v)
+        self.__set_categories()
+
+    def __index_version(self, version):
+        i = list(self.__HS).index(version)
+        order = np.argsort(self.__codes[:, i], kind='stable')
+        self.__sorted_codes[version], starts = np.unique(self.__codes[order, i], return_index=True)
+        self.__rows[version] = order.astype(np.int32), np.append(starts, len(order)).astype(np.int32)
+
+    def __rows_of(self, version, codes):
+        # rows where `version` has one of `codes`, grouped by code
+        sorted_codes = self.__sorted_codes[version]
+        order, starts = self.__rows[version]
+        codes = np.atleast_1d(np.asarray(codes, dtype=np.int64))
+        pos = np.searchsorted(sorted_codes, codes)
+        pos = pos[(pos<len(sorted_codes))&(sorted_codes[np.minimum(pos, len(sorted_codes)-1)]==codes)]
+        if len(pos)==1:
+            return order[starts[pos[0]]:starts[pos[0]+1]]
+        return np.concatenate([order[starts[p]:starts[p+1]] for p in pos.tolist()]) if len(pos) else order[:0]
+
+    def __set_categories(self):
+        categories = np.unique(self.__codes)
+        dtype = pd.CategoricalDtype(pd.Index(categories).astype(str).str.zfill(6))
+        self.__data = pd.DataFrame({v: pd.Categorical.from_codes(np.searchsorted(categories, self.__codes[:, i]), dtype=dtype)
+                                    for i, v in enumerate(self.__HS)})
+
+    @_timed
+    def add_version(self, version, year, table, comtrade=None):
+        """Append a new HS edition (e.g. HS22) after the latest loaded version.
+
+        `table` is either the codes of the new version for every row of `get_df()`, or a
+        two-column conversion table from the latest version to the new one; codes it does not
+        list are carried over unchanged and codes mapped to several new codes add rows. The
+        row indexes are rebuilt; cached components and windows of periods ending before the
+        new version stay valid, while those of periods that include it are built in full on
+        first use. Cached precision-loss metrics are dropped. `comtrade` is the Comtrade
+        classification code of the version (e.g. 'H6') used for descriptions.
+
+        Returns the homogeneous series of the whole table that change: merged with other
+        series or not carried 1:1, code for code, into the new version."""
+        last = list(self.__HS)[-1]
+        if version in self.__HS or year<=self.__years[last]:
+            raise ValueError(f"{version} ({year}) must be a new version after {last} ({self.__years[last]})")
+        old = self.component_index(self.__years[list(self.__HS)[0]], self.__years[last])
+        n = len(self.__codes)
+        if isinstance(table, pd.DataFrame) and table.shape[1]==2:
+            pairs = table.apply(lambda c: pd.to_numeric(c.astype(str))).astype('int64').drop_duplicates()
+            pairs.columns = ['a', 'b']
+            unlisted = np.setdiff1d(self.__sorted_codes[last], pairs.a)
+            pairs = pd.concat([pairs, pd.DataFrame({'a': unlisted, 'b': unlisted})], ignore_index=True)
+            matches = pd.DataFrame({'row': np.arange(n), 'a': self.__codes[:, -1]}).merge(pairs, on='a', how='left')
+            first = ~matches.row.duplicated()
+            column = matches.b[first].to_numpy()
+            extra = matches[~first]
+        else:
+            column = pd.to_numeric(pd.Series(np.asarray(table).ravel()).astype(str)).to_numpy()
+            if len(column)!=n:
+                raise ValueError(f"Expected {n} codes, one per row of the table, got {len(column)}")
+            extra = pd.DataFrame({'row': np.array([], dtype=int), 'b': np.array([], dtype=int)})
+
+        added = self.__codes[extra.row.to_numpy()]
+        codes = np.column_stack([np.vstack([self.__codes, added]), np.concatenate([column, extra.b.to_numpy()])])
+        self.__HS[version] = comtrade
+        self.__years[version] = year
+        self.__codes = np.ascontiguousarray(codes, dtype=np.int32)
+        for v in self.__HS:
+            self.__index_version(v)
+        self.__set_categories()
+        self.__precision.clear() #its frames have one column per version
+        if self.__text_index is not None and comtrade:
+            self.__add_to_text_index(version)
+
+        # components of the old table are linked through the codes of the new version
+        links = pd.DataFrame({'component': old.labels[old.lookup(last, codes[:, -2])], 'a': codes[:, -2], 'b': codes[:, -1]}).drop_duplicates()
+        fan_out = links.groupby('a')['b'].transform('nunique')
+        fan_in = links.groupby('b')['a'].transform('nunique')
+        links['kept'] = (fan_out==1)&(fan_in==1)&(links.a==links.b)
+        new_ids, new_codes = pd.factorize(links.b)
+        labels = _component_labels(links.component.to_numpy(), len(old)+new_ids, len(old)+len(new_codes))
+        links['new_component'] = pd.factorize(labels[links.component.to_numpy()])[0]
+        report = links.groupby('component').agg(new_component=('new_component', 'first'),
+                                                members=('a', lambda x: sorted(set(str(c).zfill(6) for c in x))),
+                                                new_codes=('b', lambda x: sorted(set(str(c).zfill(6) for c in x))),
+                                                one_to_one=('kept', 'all'))
+        report['merged'] = report.groupby('new_component')['members'].transform('size')>1
+        report = report[report.merged|~report.one_to_one]
+        return report.rename(columns={'members': last, 'new_codes': version}).reset_index()
+
+    def get_descriptions(self, HS="HS17"):
+        """Comtrade descriptions of an HS version, read from `descriptions_dir` (downloaded once if missing)."""
+        return self.__descriptions(HS)[0]
+
+    def __descriptions(self, HS):
+        if not self.__HS[HS]:
+            raise ValueError(f"No Comtrade classification given for {HS}")
+        path = self.__descriptions_dir/f"classification{self.__HS[HS]}.json"
+        _hit(self.stats, 'descriptions', path.exists())
+        if not path.exists():
+            self.__download_descriptions([HS])
+        return _read_descriptions(str(path))
+
+    def __download_descriptions(self, versions):
+        # missing classification files are fetched concurrently
+        missing = [v for v in versions if self.__HS[v] and not (self.__descriptions_dir/f"classification{self.__HS[v]}.json").exists()]
+        if missing:
+            contents = self.__fetcher.get_many([f"{self.__comtrade_url}classification{self.__HS[v]}.json" for v in missing])
+            self.__descriptions_dir.mkdir(parents=True, exist_ok=True)
+            for v, content in zip(missing, contents):
+                (self.__descriptions_dir/f"classification{self.__HS[v]}.json").write_bytes(content)
+
+    def clear_cache(self):
+        for f in self.__cache_dir.glob("correlations-*.npz"):
+            f.unlink()
 
     def available_methods(self):
         print("Use `get_df()` to get dataframe with the correlations between all HS versions\n")
@@ -44,32 +668,96 @@ class HSCorrelations:
         print("Use `year_to_HS()` to get the available HS version from years")
         #uncomplete
     
+    def __is_local(self):
+        return os.path.isdir(self.__url_base)
+
+    def get_conversion_links(self):
+        if self.__conversion_links is None:
+            if self.__is_local():
+                with open(os.path.join(self.__url_base, self.__url_suffix), 'rb') as f:
+                    content = f.read()
+            else:
+                content = self.__fetcher.get(self.__url_base+self.__url_suffix)
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(content, "html.parser")
+            self.__conversion_links = [str(x)[9: str(x).index('">')] for x in list(soup.find_all('a', href=True)) if "tables/HS" in str(x)]
+        return self.__conversion_links
+
     def get_conversion_link(self, from_year=None, to_year=None): 
-        headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/47.0.2526.106 Safari/537.36'}
-        r = requests.get(self.__url_base+self.__url_suffix, headers= headers)
-        soup = BeautifulSoup(r.content, "html.parser")
-        all_links = [str(x)[9: str(x).index('">')] for x in list(soup.find_all('a', href=True)) if "tables/HS" in str(x)]
-        link = [x for x in all_links if str(from_year) in x and str(to_year) in x][0]
+        links = [x for x in self.get_conversion_links() if re.search(f"{from_year}\\D+{to_year}", x)]
+        if not links:
+            raise ValueError(f"No conversion table from {from_year} to {to_year}")
+        link = links[0]
+        if self.__is_local():
+            return os.path.join(self.__url_base, link)
         return self.__url_base+link.replace(" ", "%20")
 
-    def get_conversion_table(self, from_year=None, to_year=None): 
-        url = self.get_conversion_link(from_year=from_year, to_year=to_year)
-        xl = pd.ExcelFile(url)
+    @_timed
+    def get_conversion_table(self, from_year=None, to_year=None, refresh=False): 
+        key = (from_year, to_year)
+        _hit(self.stats, 'conversions', key in self.__conversions and not refresh)
+        if key not in self.__conversions or refresh:
+            cache_file = self.__conversion_cache_file(from_year, to_year)
+            _hit(self.stats, 'conversions_disk', cache_file.exists() and not refresh)
+            if cache_file.exists() and not refresh:
+                with np.load(cache_file) as npz:
+                    self.__conversions[key] = pd.DataFrame(npz['codes'], columns=npz['columns'].tolist(), dtype=object)
+            else:
+                self.ingest_conversion_table(self.get_conversion_link(from_year=from_year, to_year=to_year), from_year, to_year)
+        return self.__conversions[key].copy()
+
+    def ingest_conversion_table(self, source, from_year, to_year):
+        """Parse a conversion workbook (path or URL) and cache it as the table of the pair."""
+        data = self.__parse_conversion_table(io.BytesIO(self.__fetcher.get(source)) if _is_url(source) else source)
+        cache_file = self.__conversion_cache_file(from_year, to_year)
+        try:
+            _write_atomic(cache_file, lambda f: np.savez(f, codes=data.to_numpy(dtype=str),
+                                                         columns=np.array([str(c) for c in data.columns])))
+        except OSError as e:
+            self.__logger.warning("Could not write the cache %s: %s", cache_file, e)
+        self.__conversions[from_year, to_year] = data
+        return data
+
+    @_timed
+    def prefetch_conversion_tables(self, refresh=False):
+        """Load and cache the table of every version pair linked from the conversion page."""
+        pairs = []
+        for link in self.get_conversion_links():
+            years = re.findall("(?:19|20)\\d{2}", link)
+            if len(years)>=2:
+                pair = (int(years[0]), int(years[1]))
+                self.get_conversion_table(*pair, refresh=refresh)
+                pairs.append(pair)
+        return pairs
+
+    def conversion_lookup(self, from_year=None, to_year=None):
+        """Forward (first column -> codes of the second) and backward dicts of a conversion table."""
+        data = self.get_conversion_table(from_year, to_year)
+        a, b = data.columns
+        forward = data.groupby(a, sort=False)[b].agg(list).to_dict()
+        backward = data.groupby(b, sort=False)[a].agg(list).to_dict()
+        return forward, backward
+
+    def __conversion_cache_file(self, from_year, to_year):
+        source = hashlib.sha256(str(self.__url_base).encode()).hexdigest()[:8]
+        return self.__cache_dir/"conversions"/f"{from_year}-{to_year}-{source}.npz"
+
+    @staticmethod
+    def __parse_conversion_table(source):
+        xl = pd.ExcelFile(source)
         sheet_num = [idx for idx, s in enumerate(xl.sheet_names) if 'Conversion' in s][0]
         df = xl.parse(sheet_num, header=None)
         df = df.dropna(how="all", axis=0)
         df = df.dropna(how='all', axis=1).reset_index(drop=True)
-        ncols = len(df.columns)
-        tups = [(idx,s) for idx, s in enumerate(list(itertools.chain(*df.values))) if "HS" in str(s) and "Conversion" not in str(s)]
-        id1, s1 = tups[0][0],tups[0][1]
-        id2, s2 = tups[1][0], tups[1][1]
-        a = list(range(0,ncols))*10
-        col1id, col2id = a[id1], a[id2]
+        cells = df.astype(str)
+        headers = np.argwhere((cells.apply(lambda c: c.str.contains("HS")) & ~cells.apply(lambda c: c.str.contains("Conversion"))).to_numpy())
+        (row, col1id), (_, col2id) = headers[0], headers[1]
+        s1, s2 = df.iat[row, col1id], df.iat[headers[1][0], col2id]
         df = df.iloc[:,np.array([col1id,col2id])]
         df.columns = [s1, s2]
         ind = df[df[s1]==s1].index[0]
         data = df.iloc[ind+1:,:].dropna().reset_index(drop=True)
-        return data
+        return data.apply(lambda c: c.map(lambda x: str(int(x)).zfill(6) if isinstance(x, (int, float)) else str(x))).astype(object)
 
     def get_df(self):
         return self.__data
@@ -81,14 +769,42 @@ class HSCorrelations:
         return self.__HS.keys()
 
     def get_codes(self, version="HS17", chapter=None): 
+        if isinstance(version, str):
+            return pd.DataFrame({version: self.get_children(chapter, version) if chapter else
+                                 pd.Series(self.__sorted_codes[version]).astype(str).str.zfill(6).tolist()})
         df = pd.DataFrame(self.__data[version], columns = [version]).drop_duplicates()
         if chapter:
             df = df[df[version].str.startswith(chapter)]
         return df
+
+    def get_children(self, prefix, version="HS17"):
+        """HS6 codes of a version under a chapter (2 digits), heading (4 digits) or any other prefix.
+        Codes are sorted, so every prefix is a contiguous slice."""
+        codes = self.__sorted_codes[version]
+        if not (isinstance(prefix, str) and prefix.isdigit() and len(prefix)<=6):
+            return []
+        scale = 10**(6-len(prefix))
+        lo, hi = np.searchsorted(codes, [int(prefix)*scale, (int(prefix)+1)*scale])
+        return [str(c).zfill(6) for c in codes[lo:hi].tolist()]
+
+    def __exists(self, position, level):
+        if level==6:
+            return self.check_position(position)
+        return _to_code(position, level)>=0 and any(self.get_children(position, v) for v in self.__HS)
     
     def check_position(self, position=None):
         if position:
-            return position in self.__data.values
+            code = _to_code(position)
+            return any(self.__contains(v, code) for v in self.__HS)
+
+    def __contains(self, version, code):
+        codes = self.__sorted_codes[version]
+        i = np.searchsorted(codes, code)
+        return bool(i<len(codes) and codes[i]==code)
+
+    def versions_of(self, position=None, start_year=None, end_year=None):
+        code = _to_code(position)
+        return [v for v in self.year_to_HS(start_year, end_year) if self.__contains(v, code)]
             
     
     def year_to_HS(self, start_year=None, end_year=None):
@@ -97,8 +813,8 @@ class HSCorrelations:
         if end_year==None: 
             end_year = datetime.now().year
         if start_year < 1992 or end_year<start_year or end_year>datetime.now().year: 
-            print("Uncorrect years")
-        years = [1992, 1996, 2002, 2007, 2012, 2017]
+            self.__logger.warning("Uncorrect years")
+        years = list(self.__years.values())
         version_dict = {k:v for k,v in zip(years, self.__HS.keys())}
         start_v = functools.reduce(lambda a,b: a if a<=start_year else b, list(reversed(years)))
         end_v = functools.reduce(lambda a,b: a if a<=end_year else b, list(reversed(years)))
@@ -106,205 +822,321 @@ class HSCorrelations:
         return [version_dict[x] for x in years_list]
     
     def HS_to_years(self,hslist):
-        y = [1992, 1996, 2002, 2007, 2012, 2017]
-        v_dict = {k:v for k,v in zip(self.__HS.keys(), y)}
+        y = list(self.__years.values())
+        v_dict = self.__years
         y_list = [v_dict[x] for x in hslist]
-        start = min(y_list)
-        end = datetime.now().year if max(y_list)==y[-1] else max(y_list)
-        if start==end:
+        start, last = min(y_list), max(y_list)
+        if last==y[-1]:
+            end = datetime.now().year
+        elif start==last:
+            end = y[y.index(last)+1]-1 #a single version is in force until the next one
+        else:
+            end = last
+        if start==end and last==y[-1]:
             return f"from {str(end)} to the present"
         else: 
             return f"from {str(start)} to {str(end)}"
         
         
+    @_timed
     def filter_df(self, positions=None, start_year=None, end_year=None): 
         cols = self.year_to_HS(start_year, end_year) #filtra primero por año
         df = self.__data[cols]
         if positions:
-            filters = [(df[col].isin(positions)) for col in cols] #filtra luego por presencia de posiciones en columna
-            mask = functools.reduce(and_, filters, True)
-            return df[mask].drop_duplicates().reset_index(drop=True)
+            idx = [list(self.__HS).index(col) for col in cols]
+            codes = {_to_code(p) for p in positions}
+            rows = np.sort(self.__rows_of(cols[0], list(codes)))
+            mask = np.isin(self.__codes[rows][:, idx], list(codes)).all(axis=1) #filtra luego por presencia de posiciones en columna
+            return df.iloc[rows[mask]].drop_duplicates().reset_index(drop=True)
         else:
             return df         
             
-    def find_homogeneous_serie(self, position=None, start_year=None, end_year=None):
-        if self.check_position(position): 
-            cols = self.year_to_HS(start_year, end_year)
-            dataa = self.filter_df(start_year=start_year, end_year=end_year)
-            data = dataa.copy()
-            versions = [v for v in cols if data[v].str.contains(position).any()]
-            if len(versions)>0:
-                for col in cols:
-                    data[col] = data[col].apply(lambda x: col+"-"+str(int(x)).zfill(6))
-                connections = []
-                for i in range(len(cols)-1): 
-                    temp_tup_list = list(data[[cols[i], cols[i+1]]].drop_duplicates().itertuples(index=False, name=None))
-                    connections = connections + temp_tup_list 
-                G = nx.Graph()
-                G.add_edges_from(connections)
-                positions = sorted(nx.node_connected_component(G, versions[-1]+"-"+position))
-                return positions
+    def component_index(self, start_year=None, end_year=None, level=6):
+        # level 6 links HS6 positions; 4 and 2 link headings and chapters
+        cols = tuple(self.year_to_HS(start_year, end_year))
+        _hit(self.stats, 'components', (cols, level) in self.__components)
+        if (cols, level) not in self.__components:
+            idx = [list(self.__HS).index(col) for col in cols]
+            with _timer(self.stats, 'graph_build'):
+                self.__components[cols, level] = _ComponentIndex(cols, self.__codes[:, idx]//10**(6-level), level)
+        return self.__components[cols, level]
+
+    @_timed
+    def find_homogeneous_series(self, positions, start_year=None, end_year=None, level=6):
+        """Bulk version of `find_homogeneous_serie`.
+
+        Returns one row per position with the version it was found in (the latest one of the
+        period), its component id, the member codes of the component per version and the
+        longest window of versions over which the position, in any version of the period,
+        maps 1:1 (no precision loss). Unlike `trade_off2`, which only rules out splits, codes
+        merged into the position also end the window. With `level` 4 or 2 positions are
+        truncated to their heading or chapter and linked at that level."""
+        index = self.component_index(start_year, end_year, level)
+        with _timer(self.stats, 'component_search'):
+            return _resolve(index, positions, level)
+
+    @_timed
+    def resolve_all(self, positions=None, windows=None, level=6, workers=None, chunksize=2000):
+        """`find_homogeneous_series` for many year windows, spread over a process pool.
+
+        `windows` is a list of (start_year, end_year) and defaults to every pair of versions;
+        `positions` defaults to every code of the table. Workers map the int32 code table from
+        a temporary .npy file instead of receiving a pickled copy, and results come back in
+        window then position order whatever the number of workers."""
+        versions = list(self.__HS)
+        y = list(self.__years.values())
+        if windows is None:
+            windows = [(a, b) for a, b in itertools.combinations_with_replacement(y, 2)]
+        if positions is None:
+            positions = pd.Series(np.unique(self.__codes)).astype(str).str.zfill(6).tolist()
+        positions = list(positions)
+        tasks = [(tuple(self.year_to_HS(a, b)), positions[i:i+chunksize], level)
+                 for a, b in windows for i in range(0, len(positions), chunksize)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "codes.npy")
+            np.save(path, self.__codes)
+            if workers==1:
+                _init_worker(path, versions)
+                results = list(map(_resolve_task, tasks))
+                _worker.clear()
             else:
-                return None
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path, versions)) as pool:
+                    results = list(pool.map(_resolve_task, tasks))
+        for (cols, _, _), result in zip(tasks, results):
+            result.insert(0, 'start_version', cols[0])
+            result.insert(1, 'end_version', cols[-1])
+        # windows that leave out a version have no column for it
+        columns = ['start_version', 'end_version', 'position', 'version', 'component']+versions+['no_loss_from', 'no_loss_to']
+        return pd.concat(results, ignore_index=True).reindex(columns=columns)
+
+    @_timed
+    def get_no_loss_windows(self, start_year=None, end_year=None, level=6):
+        """Longest window of versions over which every code of the period maps 1:1
+        (without aggregation) to a single code of the other versions. `level` 4 or 2
+        gives the windows of headings or chapters."""
+        index = self.component_index(start_year, end_year, level)
+        start, end = index.windows()
+        y = list(self.__years.values())
+        years = self.__years
+        last_years = dict(zip(self.__HS, [x-1 for x in y[1:]]+[datetime.now().year]))
+        windows = index.nodes().drop(columns='component').rename(columns={'code': 'position'})
+        windows['no_loss_from'] = np.asarray(index.versions)[start]
+        windows['no_loss_to'] = np.asarray(index.versions)[end]
+        windows['from_year'] = np.array([years[v] for v in index.versions])[start]
+        windows['to_year'] = np.array([last_years[v] for v in index.versions])[end]
+        return windows
+
+    def save_no_loss_windows(self, path, start_year=None, end_year=None, level=6):
+        self.get_no_loss_windows(start_year, end_year, level).to_csv(path, index=False)
+
+    @staticmethod
+    def load_no_loss_windows(path):
+        return pd.read_csv(path, dtype={'position': str})
+
+    @_timed
+    def precision_loss(self, windows=None, level=6):
+        """Precision lost by every code of the table for each year window.
+
+        `windows` is a list of (start_year, end_year) and defaults to every pair of versions.
+        One row per window and node with the size of its component, the number of codes of the
+        component in each version (0 outside the window), the codes it is linked to in the
+        previous (fan_in) and next (fan_out) version and their ratio. `precision_loss` is the
+        number of codes the component holds beyond one per version, 0 for a 1:1 series."""
+        y = list(self.__years.values())
+        windows = windows if windows is not None else itertools.combinations_with_replacement(y, 2)
+        # keyed on the versions of each window, which stay valid when a version is added
+        key = tuple(tuple(self.year_to_HS(a, b)) for a, b in windows), level
+        _hit(self.stats, 'precision_loss', key in self.__precision)
+        if key not in self.__precision:
+            versions = list(self.__HS)
+            frames = []
+            for cols in key[0]:
+                index = self.component_index(self.__years[cols[0]], self.__years[cols[-1]], level)
+                size, per_version, fan_in, fan_out = index.metrics()
+                frame = index.nodes().rename(columns={'code': 'position'})
+                frame.insert(0, 'start_version', index.versions[0])
+                frame.insert(1, 'end_version', index.versions[-1])
+                frame['component_size'] = size
+                for v in versions:
+                    frame[v] = per_version[:, index.versions.index(v)] if v in index.versions else 0
+                frame['fan_in'] = fan_in
+                frame['fan_out'] = fan_out
+                frame['fan_ratio'] = np.divide(fan_in, fan_out, out=np.full(len(size), np.nan), where=fan_out>0)
+                frame['precision_loss'] = size-len(index.versions)
+                frames.append(frame)
+            self.__precision[key] = pd.concat(frames, ignore_index=True)
+        return self.__precision[key].copy()
+
+    def save_precision_loss(self, path, windows=None, level=6):
+        self.precision_loss(windows, level).to_csv(path, index=False)
+
+    @staticmethod
+    def load_precision_loss(path):
+        return pd.read_csv(path, dtype={'position': str})
+
+    @_timed
+    def save_graph(self, directory, level=6):
+        """Write the correlation graph of all versions to `directory` for `CorrelationGraph`."""
+        index = self.component_index(level=level)
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        u = np.concatenate([index.edges[:, 0], index.edges[:, 1]])
+        v = np.concatenate([index.edges[:, 1], index.edges[:, 0]])
+        order = np.lexsort((v, u))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(u, minlength=len(index.keys)))])
+        np.save(directory/"keys.npy", index.keys.astype(np.int32))
+        np.save(directory/"indptr.npy", indptr.astype(np.int32))
+        np.save(directory/"indices.npy", v[order].astype(np.int32))
+        np.save(directory/"labels.npy", index.labels.astype(np.int32))
+        np.save(directory/"order.npy", index.order.astype(np.int32))
+        np.save(directory/"bounds.npy", index.bounds.astype(np.int32))
+        with open(directory/"versions.json", 'w') as f:
+            json.dump({'versions': index.versions, 'digits': level}, f)
+
+    @_timed
+    def find_homogeneous_serie(self, position=None, start_year=None, end_year=None, level=6):
+        # headings and chapters can be given as any longer prefix, up to the HS6 position
+        if level<6 and isinstance(position, str) and re.fullmatch("\\d{%d,6}" % level, position):
+            position = position[:level]
+        if self.__exists(position, level): 
+            index = self.component_index(start_year, end_year, level)
+            with _timer(self.stats, 'component_search'):
+                for v in reversed(index.versions):
+                    component = index.component(v, position)
+                    if component>=0:
+                        return sorted(f"{version}-{code}" for version, code in index.members(component))
+            return None
         else:
-            print("Please define a correct position")
-    
-    def genSankey(self, position=None, start_year=None, end_year=None, output_title='Sankey Diagram'):
-        if self.check_position(position): 
-            related = list(set([x[5:] for x in self.find_homogeneous_serie(position, start_year, end_year)]))
-            cat_cols = self.year_to_HS(start_year, end_year)
-            dfa = self.filter_df(related, start_year, end_year)
-            dfa['count'] = 1
-            df = dfa.copy()
-            for col in cat_cols: 
-                df[col] = df[col].apply(lambda x: col+"-"+str(int(x)).zfill(6))
-            colorPalette = ['#4B8BBE','#306998','#FFE873','#FFD43B','#646464',"#002060"]
-            labelList = []
-            colorNumList = []
-            for catCol in cat_cols:
-                labelListTemp =  list(set(df[catCol].values))
-                colorNumList.append(len(labelListTemp))
-                labelList = labelList + labelListTemp
-
-            # remove duplicates from labelList
-            labelList = list(dict.fromkeys(labelList))
-
-            # define colors based on number of levels
-            colorList = []
-            for idx, colorNum in enumerate(colorNumList):
-                colorList = colorList + [colorPalette[idx]]*colorNum
-
-            # transform df into a source-target pair
-            for i in range(len(cat_cols)-1):
-                if i==0:
-                    sourceTargetDf = df[[cat_cols[i],cat_cols[i+1],'count']]
-                    sourceTargetDf.columns = ['source','target','count']
-                else:
-                    tempDf = df[[cat_cols[i],cat_cols[i+1],'count']]
-                    tempDf.columns = ['source','target','count']
-                    sourceTargetDf = pd.concat([sourceTargetDf,tempDf])
-
-            sourceTargetDf = sourceTargetDf.groupby(['source','target']).agg({'count':'sum'}).reset_index()
-
-            # add index for source-target pair
-            sourceTargetDf['sourceID'] = sourceTargetDf['source'].apply(lambda x: labelList.index(x))
-            sourceTargetDf['targetID'] = sourceTargetDf['target'].apply(lambda x: labelList.index(x))
-
-            # creating the sankey diagram
-            data = dict(
-                type='sankey',
-                node = dict(
-                  pad = 15,
-                  thickness = 20,
-                  line = dict(
-                    color = "black",
-                    width = 0.5
-                  ),
-                  label = labelList,
-                  color = colorList
-                ),
-                link = dict(
-                  source = sourceTargetDf['sourceID'],
-                  target = sourceTargetDf['targetID'],
-                  value = sourceTargetDf['count']
-                )
-              )
-
-            layout =  dict(
-                title = output_title,
-                font = dict(
-                  size = 10
-                )
-            )
-
-            fig = dict(data=[data], layout=layout)
-            return fig
-        else: 
-           print("Please define a correct position") 
+            self.__logger.warning("Please define a correct position")
     
+    @_timed
+    def convert_trade_flows(self, source, destination=None, start_year=None, end_year=None, target=None,
+                            code_col='code', year_col='year', value_col='value', chunksize=500_000):
+        """Aggregate a trade-flow file (code, year, value) by homogeneous series, chunk by chunk.
 
-    def genSankey2(self, position=None, start_year=None, end_year=None, output_title='Sankey Diagram'):
+        Each row is read with the HS version in force in its year and mapped to the component of
+        the period that contains its code; `group` lists the codes of the component in the `target`
+        version (default: the latest version of the period). Rows outside the period or with
+        unknown codes are kept under component -1. The result is written to `destination`
+        (.csv or .parquet) if given, and returned."""
+        index = self.component_index(start_year, end_year)
+        y = list(self.__years.values())
+        first = list(self.__HS).index(index.versions[0])
+        target = target if target else index.versions[-1]
+        totals = None
+        for chunk in self.__read_chunks(source, [code_col, year_col, value_col], chunksize):
+            years = pd.to_numeric(chunk[year_col], errors='coerce').fillna(0).astype('int64').to_numpy()
+            codes = pd.to_numeric(chunk[code_col], errors='coerce').fillna(-1).astype('int64').to_numpy()
+            version = np.searchsorted(y, years, side='right')-1-first
+            nodes = np.full(len(chunk), -1)
+            valid = (version>=0)&(version<len(index.versions))&(codes>=0)
+            for i, v in enumerate(index.versions):
+                rows = np.flatnonzero(valid&(version==i))
+                nodes[rows] = index.lookup(v, codes[rows])
+            partial = pd.DataFrame({'component': np.where(nodes>=0, index.labels[nodes], -1),
+                                    'year': years,
+                                    'value': pd.to_numeric(chunk[value_col], errors='coerce').to_numpy()})
+            partial = partial.groupby(['component', 'year'])['value'].sum()
+            totals = partial if totals is None else totals.add(partial, fill_value=0)
+        totals = totals.reset_index() if totals is not None else pd.DataFrame(columns=['component', 'year', 'value'])
+        nodes = index.nodes()
+        groups = nodes[nodes.version==target].groupby('component')['code'].agg("|".join).rename('group')
+        result = totals.join(groups, on='component')[['component', 'group', 'year', 'value']]
+        if destination:
+            if str(destination).endswith('.parquet'):
+                result.to_parquet(destination, index=False)
+            else:
+                result.to_csv(destination, index=False)
+        return result
+
+    @staticmethod
+    def __read_chunks(source, columns, chunksize):
+        if str(source).endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(source, usecols=columns, dtype={columns[0]: str}, chunksize=chunksize)
+
+    @_timed
+    def sankey(self, position=None, start_year=None, end_year=None, output_title='Sankey Diagram', as_figure=True):
         if self.check_position(position): 
             hom_series = self.find_homogeneous_serie(position, start_year, end_year)
             if hom_series: 
-                related = list(set([x[5:] for x in hom_series]))
+                related = list(set([x.rsplit("-", 1)[1] for x in hom_series]))
                 cat_cols = self.year_to_HS(start_year, end_year)
-                dfa = self.filter_df(related, start_year, end_year)
-                dfa['count'] = 1
-                df = dfa.copy()
-                for col in cat_cols: 
-                    df[col] = df[col].apply(lambda x: col+"-"+str(int(x)).zfill(6))
-                colorPalette = ['#4B8BBE','#306998','#FFE873','#FFD43B','#646464',"#002060"]
-                labelList = []
-                colorNumList = []
-                for catCol in cat_cols:
-                    labelListTemp =  list(set(df[catCol].values))
-                    colorNumList.append(len(labelListTemp))
-                    labelList = labelList + labelListTemp
-
-                # remove duplicates from labelList
-                labelList = list(dict.fromkeys(labelList))
-
-                # define colors based on number of levels
-                colorList = []
-                for idx, colorNum in enumerate(colorNumList):
-                    colorList = colorList + [colorPalette[idx]]*colorNum
-
-                # transform df into a source-target pair
-                for i in range(len(cat_cols)-1):
-                    if i==0:
-                        sourceTargetDf = df[[cat_cols[i],cat_cols[i+1],'count']]
-                        sourceTargetDf.columns = ['source','target','count']
-                    else:
-                        tempDf = df[[cat_cols[i],cat_cols[i+1],'count']]
-                        tempDf.columns = ['source','target','count']
-                        sourceTargetDf = pd.concat([sourceTargetDf,tempDf])
-
-                sourceTargetDf = sourceTargetDf.groupby(['source','target']).agg({'count':'sum'}).reset_index()
-
-                # add index for source-target pair
-                sourceTargetDf['sourceID'] = sourceTargetDf['source'].apply(lambda x: labelList.index(x))
-                sourceTargetDf['targetID'] = sourceTargetDf['target'].apply(lambda x: labelList.index(x))
-
-                import plotly.graph_objects as go
-
-                fig = go.Figure(data = [go.Sankey(
+                df = self.filter_df(related, start_year, end_year)
+
+                with _timer(self.stats, 'render'):
+                    # one node id per version-code label, factorized over all versions at once
+                    nodes = pd.concat([col+"-"+df[col].astype(str) for col in cat_cols], ignore_index=True)
+                    ids, labels = pd.factorize(nodes)
+                    ids = ids.reshape(len(cat_cols), len(df))
+                    labelList = labels.tolist()
+
+                    # define colors based on the version of each node, taken from its row of `ids`
+                    colorPalette = ['#4B8BBE','#306998','#FFE873','#FFD43B','#646464',"#002060"]
+                    nodeVersion = np.empty(len(labelList), dtype=int)
+                    nodeVersion[ids.ravel()] = np.repeat(np.arange(len(cat_cols)), len(df))
+                    colorList = [colorPalette[i%len(colorPalette)] for i in nodeVersion.tolist()]
+
+                    # source-target pairs between consecutive versions, counting the rows linking them
+                    sourceTargetDf = pd.DataFrame({'sourceID': ids[:-1].ravel(), 'targetID': ids[1:].ravel()})
+                    sourceTargetDf = sourceTargetDf.groupby(['sourceID','targetID']).size().reset_index(name='count')
+
                     node = dict(
                       pad = 15,
                       thickness = 20,
                       line = dict(
                         color = "black",
-                        width = 0.5),
+                        width = 0.5
+                      ),
                       label = labelList,
                       color = colorList
-                    ),
+                    )
                     link = dict(
                       source = sourceTargetDf['sourceID'],
                       target = sourceTargetDf['targetID'],
                       value = sourceTargetDf['count']
                     )
 
-                    )]
-                )
+                    if not as_figure:
+                        data = dict(type='sankey', node=node, link=link)
+                        layout =  dict(
+                            title = output_title,
+                            font = dict(
+                              size = 10
+                            )
+                        )
+                        return dict(data=[data], layout=layout)
 
-                fig.update_layout(title_text = output_title, 
-                    font_size = 10,
-                    margin=dict(l=20, r=20, t=20, b=20))
+                    import plotly.graph_objects as go
+
+                    fig = go.Figure(data = [go.Sankey(node=node, link=link)])
+                    fig.update_layout(title_text = output_title, 
+                        font_size = 10,
+                        margin=dict(l=20, r=20, t=20, b=20))
                 
-                return fig
+                    return fig
             else: 
-                print(f"Position {position} not correspond to that period")
+                self.__logger.warning("Position %s not correspond to that period", position)
         else: 
-           print("Please define a correct position")
+           self.__logger.warning("Please define a correct position")
+
+    def genSankey(self, position=None, start_year=None, end_year=None, output_title='Sankey Diagram'):
+        return self.sankey(position, start_year, end_year, output_title, as_figure=False)
+
+    def genSankey2(self, position=None, start_year=None, end_year=None, output_title='Sankey Diagram'):
+        return self.sankey(position, start_year, end_year, output_title, as_figure=True)
 
 
 
-    def recursive_trade_off(self, df, position, k): 
+    def recursive_trade_off(self, df, position, k, members=None): 
+        import networkx as nx
     
         if k>=0:
             currcols = df.columns.tolist()[k:]
-            print(currcols, "(up currcols)")
-            print(f"Evaluating graph object with {', '.join(currcols)} versions\n")
+            self.__logger.debug("Evaluating graph object with %s versions", currcols)
             data = df[currcols].drop_duplicates()
             connections = []
             for i in range(len(currcols)-1): 
@@ -314,47 +1146,51 @@ class HSCorrelations:
             G.add_edges_from(connections)
             try:
                 positions = sorted(nx.node_connected_component(G, currcols[-1]+"-"+position))
-                print(positions, "connected positions\n", k, "k")
-                if len(positions)==len(currcols): 
-                    return self.recursive_trade_off(df, position, k-1)
-                else: 
-                    print("Evaluation finished\n")
-                    print(currcols[1:], "(down currcols)")
-                    print(f"Your position has no precision loss {self.HS_to_years(currcols[1:])}")
-            except:
-                print(f"Position {position} not founded")
+            except KeyError:
+                self.__logger.warning("Position %s not founded", position)
+                return None
+            self.__logger.debug("Connected positions at k=%s: %s", k, positions)
+            if len(positions)==len(currcols): 
+                return self.recursive_trade_off(df, position, k-1, positions)
+            window = currcols[1:]
         else:
-            print(f"Your position has no precision loss {self.HS_to_years(df.columns)}")
+            window = df.columns.tolist()
+        result = TradeOff(position=position, start=window[0], end=window[-1], years=self.HS_to_years(window),
+                          members=members if members else [window[-1]+"-"+position],
+                          precision_loss=len(window)<len(df.columns))
+        self.__logger.info("Your position has no precision loss %s", result.years)
+        return result
         
+    @_timed
     def trade_off(self, position=None, start_year=None, end_year=None):
         if start_year==None: 
             start_year = 1992
         if end_year==None: 
             end_year = datetime.now().year
         if start_year < 1992 or end_year<start_year or end_year>datetime.now().year: 
-            return print("Uncorrect years")
-        if start_year>=2017:
-            return print("Both years belong to the latest version")
+            self.__logger.warning("Uncorrect years")
+            return None
+        if start_year>=max(self.__years.values()):
+            self.__logger.warning("Both years belong to the latest version")
+            return None
         if self.check_position(position): 
-            versions = self.year_to_HS(start_year, end_year)
-            print(f"Period between {start_year} and {end_year} contains the {','.join(versions)} versions\n") 
-            print(f"Loading HS Correlations Tables\n")
-            versions = [v for v in versions if self.__data[v].str.contains(position).any()]
+            self.__logger.info("Period between %s and %s contains the %s versions", start_year, end_year, self.year_to_HS(start_year, end_year))
+            versions = self.versions_of(position, start_year, end_year)
 
             if len(versions)>0: 
-                print(f"The position {position} was included in the {','.join(versions)} versions\n")
+                self.__logger.info("The position %s was included in the %s versions", position, versions)
                 data = self.__data[versions].drop_duplicates()
                 for col in data.columns:
-                    data[col] = data[col].apply(lambda x: col+"-"+str(int(x)).zfill(6))
+                    data[col] = col+"-"+data[col].astype(str)
                 k=len(versions)-2
-                print(f"Evaluating maximum period with no precision loss for position {position}\n")
                 return self.recursive_trade_off(data, position, k)
             else:
-                print(f"Position {position} not founded in that period")
+                self.__logger.warning("Position %s not founded in that period", position)
         else:
-            print("Please define a correct position")
+            self.__logger.warning("Please define a correct position")
 
 
+    @_timed
     def trade_off2(self, position=None, start_year=None, end_year=None): #FALTA MODIFICAR
         
         """ La idea es resolver el bugg que se genera cuando hay una relación n:1 
@@ -368,68 +1204,124 @@ class HSCorrelations:
         if end_year==None: 
             end_year = datetime.now().year
         if start_year < 1992 or end_year<start_year or end_year>datetime.now().year: 
-            return print("Uncorrect years")
-        if start_year>=2017:
-            return print("Both years belong to the latest version")
+            self.__logger.warning("Uncorrect years")
+            return None
+        if start_year>=max(self.__years.values()):
+            self.__logger.warning("Both years belong to the latest version")
+            return None
         if self.check_position(position): 
-            versions = self.year_to_HS(start_year, end_year)
-            print(f"Period between {start_year} and {end_year} contains the {','.join(versions)} versions\n") 
-            print(f"Loading HS Correlations Tables\n")
-            versions = [v for v in versions if self.__data[v].str.contains(position).any()]
+            self.__logger.info("Period between %s and %s contains the %s versions", start_year, end_year, self.year_to_HS(start_year, end_year))
+            versions = self.versions_of(position, start_year, end_year)
 
             if len(versions)>0: 
-                print(f"The position {position} was included in the {','.join(versions)} versions\n")
-                data = self.__data[versions].drop_duplicates()
+                self.__logger.info("The position %s was included in the %s versions", position, versions)
+                data = self.__data[versions]
                 dist = 0
+                selected_start = selected_end = versions[-1]
+                chain = [position]
                 for comb in itertools.combinations(versions, 2):
                     a,b = comb[0],comb[1]
                     ind_a, ind_b = versions.index(a), versions.index(b)
                     dist_temp = ind_b - ind_a
-                    length = len(data.loc[data[a]==position, a:b].drop_duplicates())
-                    if length == 1 and dist_temp>dist:
+                    rows = data.iloc[self.__rows_of(a, _to_code(position))].loc[:, a:b].drop_duplicates()
+                    if len(rows) == 1 and dist_temp>dist:
                         dist = dist_temp
                         selected_start = a
                         selected_end = b
-                print(f"Your position has no precision loss {self.HS_to_years([selected_start,selected_end])}")
+                        chain = rows.iloc[0].astype(str).tolist()
+                window = versions[versions.index(selected_start):versions.index(selected_end)+1]
+                result = TradeOff(position=position, start=selected_start, end=selected_end,
+                                  years=self.HS_to_years([selected_start,selected_end]),
+                                  members=[f"{v}-{c}" for v, c in zip(window, chain)],
+                                  precision_loss=len(window)<len(versions))
+                self.__logger.info("Your position has no precision loss %s", result.years)
+                return result
             else:
-                print(f"Position {position} not founded in that period")
+                self.__logger.warning("Position %s not founded in that period", position)
         else:
-            print("Please define a correct position")
+            self.__logger.warning("Please define a correct position")
 
 
 
     
 
+    @_timed
     def position_to_desc(self, position=None, HS=None):
         if self.check_position(position):
-            if HS:
-                url = "https://comtrade.un.org/data/cache/classification{}.json".format(self.__HS[HS])
-                json = requests.get(url).json()
-                df = pd.DataFrame(json['results'])
-                description = df.loc[df.id==position,'text']
-                if len(description)>0: 
-                   return description.values[0]
+            if HS and not self.__HS.get(HS):
+                self.__logger.warning("No Comtrade descriptions for %s", HS)
+            elif HS:
+                description = self.__descriptions(HS)[1].get(position)
+                if description is not None: 
+                   return description
                 else: 
-                    print("No matches found")
+                    self.__logger.warning("No matches found")
             else:
-                print("Please specify HS version")
+                self.__logger.warning("Please specify HS version")
         else:
-            print("Please define a correct position")
+            self.__logger.warning("Please define a correct position")
     
 
     def HS_from_year(self, year=None):
         if year==None: 
-            print("Please define year")
+            self.__logger.warning("Please define year")
         elif year < 1992 or year >datetime.now().year: 
-            print("Uncorrect year")
+            self.__logger.warning("Uncorrect year")
         else:
-            years = [1992, 1996, 2002, 2007, 2012, 2017]
+            years = list(self.__years.values())
             version_dict = {k:v for k,v in zip(years, self.__HS.keys())}
             year_v = functools.reduce(lambda a,b: a if a<=year else b, list(reversed(years)))
             return version_dict[year_v]
                 
 
 
+    def __build_text_index(self):
+        self.__download_descriptions(list(self.__HS))
+        self.__text_index = {}
+        for v in self.__HS:
+            if self.__HS[v]:
+                self.__add_to_text_index(v)
+
+    def __add_to_text_index(self, version):
+        i = list(self.__HS).index(version)
+        df = self.get_descriptions(version)
+        df = df[df.id.str.fullmatch("\\d{6}")]
+        for code, text in zip(df.id.astype(int), df.text):
+            for token in _tokens(text):
+                self.__text_index.setdefault(token, set()).add(i*1_000_000+code)
+        self.__sorted_tokens = sorted(self.__text_index)
+
+    @_timed
+    def search_positions(self, name, start_year=None, end_year=None, prefix=False):
+        """Codes whose description contains every word of `name`, ranked by the number of
+        versions of the period in which they match. With `prefix` the last word is matched
+        as a prefix, for autocompletion."""
+        _hit(self.stats, 'text_index', self.__text_index is not None)
+        if self.__text_index is None:
+            with _timer(self.stats, 'index_build'):
+                self.__build_text_index()
+        terms = _tokens(name)
+        hits = None
+        for j, term in enumerate(terms):
+            if prefix and j==len(terms)-1:
+                lo = bisect.bisect_left(self.__sorted_tokens, term)
+                hi = bisect.bisect_left(self.__sorted_tokens, term+"\uffff")
+                posting = set().union(*(self.__text_index[t] for t in self.__sorted_tokens[lo:hi]))
+            else:
+                posting = self.__text_index.get(term, set())
+            hits = posting if hits is None else hits&posting
+        versions = list(self.__HS)
+        period = [versions.index(v) for v in self.year_to_HS(start_year=start_year, end_year=end_year)]
+        hits = np.array(sorted(hits or []), dtype=np.int64)
+        hits = hits[np.isin(hits//1_000_000, period)]
+        data = pd.DataFrame({'id': pd.Series(hits%1_000_000).astype(str).str.zfill(6).to_numpy(),
+                             'version': np.asarray(versions, dtype=object)[hits//1_000_000]})
+        texts = {v: self.__descriptions(v)[1] for v in data.version.unique()}
+        data['text'] = [texts[v][c] for c, v in zip(data.id, data.version)]
+        data = data.iloc[::-1] #newest version first, its description is kept
+        grouped = data.groupby('id', sort=False).agg(text=('text', 'first'), version=('version', "|".join), score=('version', 'size'))
+        return grouped.reset_index().sort_values(['score', 'id'], ascending=[False, True]).reset_index(drop=True)
+
     def  search_position_by_name(self):
         """Hacer una función que vaya recorriendo las versiones (de más vieja a más nueva)
         busque un nombre entre las descripciones y determine cuáles son las posiciones que se pueden buscar"""
@@ -440,24 +1332,15 @@ class HSCorrelations:
         print("\nType end year:\n")
         end_year = int(input())
 
-        data = pd.DataFrame()
-        query_versions = reversed(self.year_to_HS(start_year=start_year, end_year=end_year))
-        for v in query_versions: 
-            url = "https://comtrade.un.org/data/cache/classification{}.json".format(self.__HS[v])
-            json = requests.get(url).json()
-            df = pd.DataFrame(json['results'])
-            df['version'] = v
-            df = df[(df.id.str.contains("\\b\\d{6}\\b", regex=True))&
-                (df.text.str.contains("\\b(?i)"+position_name+"s?|\\b(?i)"+position_name+"es?", flags=re.IGNORECASE, regex=True))].reset_index(drop=True)
-            data = data.append(df, ignore_index=True)
-        if len(data)==0:
-            print(f"No matches found in {v} version")
+        grouped = self.search_positions(position_name, start_year=start_year, end_year=end_year, prefix=True)
+        if len(grouped)==0:
+            print(f"No matches found")
         else: 
-            grouped = data.groupby('id').agg({'text': lambda gr: str(gr.head(1).values[0]),'version':lambda gr: "|".join(gr)}).reset_index()
             text = grouped.text+" - "+grouped.version
             print()
             return "\n".join(text.values), start_year, end_year
 
+    @_timed
     def query(self, position=None, start_year=None, end_year=None, sankey=False):
         if start_year==None: 
             start_year = 1992
@@ -465,12 +1348,16 @@ class HSCorrelations:
             end_year = datetime.now().year
         if start_year < 1992 or end_year<start_year or end_year>datetime.now().year: 
             return print("Uncorrect years")
-        if start_year>=2017:
+        if start_year>=max(self.__years.values()):
             return print("Both years belong to the latest version")
-        self.trade_off2(position=position, start_year=start_year, end_year=end_year)
+        result = self.trade_off2(position=position, start_year=start_year, end_year=end_year)
+        if result:
+            print(f"Your position has no precision loss {result.years}")
         print("*"*75)
         print(f"The positions you have to use to maintain homogeneous series between {start_year} and {end_year} is: \n\n", self.find_homogeneous_serie(position=position, start_year=start_year, end_year=end_year)) 
         if sankey: 
+            import git
+            import plotly.offline
             
             repo = git.Repo('.', search_parent_directories=True)
             repo = repo.working_tree_dir
@@ -506,7 +1393,7 @@ class HSCorrelations:
             end_year = datetime.now().year
         if start_year < 1992 or end_year<start_year or end_year>datetime.now().year: 
             return print("Uncorrect years")
-        if start_year>=2017:
+        if start_year>=max(self.__years.values()):
             return print("Both years belong to the latest version")
         
         #print(f"\nThis program allows user to get three different output related with your code {position}.\n")
@@ -530,4 +1417,4 @@ class HSCorrelations:
             #    return plotly.offline.plot(fig, validate=False, filename = f"{img_folder}{position}.html")
 
 
-    
\ No newline at end of file
+    
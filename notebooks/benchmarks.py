@@ -0,0 +1,173 @@
+"""Benchmarks for the HSCorrelations hot paths.
+
+Runs every operation against the bundled correlation table and against a synthetic
+table `--scale` times larger, and reports throughput, latency percentiles and peak
+memory (tracemalloc) per operation. Comtrade descriptions are served from a local
+fixture directory, so no network access is needed. Import times of the module and of its
+optional dependencies are measured in fresh interpreters.
+
+    python benchmarks.py [--scale 4] [--repeat 200] [--imports 5] [--json results.json]
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from HSCorrelations import HSCorrelations
+
+DATA = Path(__file__).resolve().parent.parent/"data"/"CompleteCorrelationsOfHS-SITC-BEC_20170606.xlsx"
+VERSIONS = ['HS92', 'HS96', 'HS02', 'HS07', 'HS12', 'HS17']
+OPTIONAL = ['networkx', 'requests', 'bs4', 'plotly.graph_objects', 'chart_studio.plotly', 'git']
+WORDS = ['animals', 'live', 'horses', 'fish', 'frozen', 'fresh', 'insects', 'bees', 'machines', 'parts',
+         'cotton', 'yarn', 'steel', 'tubes', 'glasses', 'boxes', 'other', 'meat', 'chilled', 'vehicles']
+
+
+def synthetic_table(n_rows, seed=0):
+    """Correlation table with `n_rows` rows where codes are kept between versions most
+    of the time and otherwise re-drawn, which produces splits and merges."""
+    rng = np.random.default_rng(seed)
+    pool = rng.choice(np.arange(10000, 1000000), size=max(n_rows//3, 10), replace=False)
+    codes = np.empty((n_rows, len(VERSIONS)), dtype=np.int64)
+    codes[:, 0] = rng.choice(pool, n_rows)
+    for i in range(1, len(VERSIONS)):
+        changed = rng.random(n_rows)<0.15
+        codes[:, i] = np.where(changed, rng.choice(pool, n_rows), codes[:, i-1])
+    return pd.DataFrame({v: pd.Series(codes[:, i]).astype(str).str.zfill(6) for i, v in enumerate(VERSIONS)})
+
+
+def write_descriptions(directory, hs, seed=0):
+    """Comtrade-like classification{H0..H5}.json files for every code of `hs`."""
+    rng = np.random.default_rng(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    df = hs.get_df()
+    for v, h in zip(VERSIONS, ['H0', 'H1', 'H2', 'H3', 'H4', 'H5']):
+        codes = df[v].astype(str).unique()
+        results = [{'id': c, 'text': f"{c} - " + " ".join(rng.choice(WORDS, 4)), 'parent': c[:4]} for c in codes]
+        with open(directory/f"classification{h}.json", 'w') as f:
+            json.dump({'results': results}, f)
+
+
+def measure(fn, repeat):
+    latencies = np.empty(repeat)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(repeat):
+            t = time.perf_counter()
+            fn(i)
+            latencies[i] = time.perf_counter()-t
+        tracemalloc.start()
+        fn(0)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {'calls': repeat,
+            'ops_per_s': repeat/latencies.sum(),
+            'p50_ms': np.percentile(latencies, 50)*1e3,
+            'p95_ms': np.percentile(latencies, 95)*1e3,
+            'p99_ms': np.percentile(latencies, 99)*1e3,
+            'peak_kb': peak/1024}
+
+
+def import_time(module, repeat):
+    """Median time to import `module` in a fresh interpreter, and the optional dependencies
+    it pulled in. None when the module is not installed."""
+    code = ("import sys, time; t = time.perf_counter(); import {}; elapsed = time.perf_counter()-t; "
+            "print(elapsed, *[m for m in {!r} if m in sys.modules])").format(module, OPTIONAL)
+    timings = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).resolve().parent, capture_output=True, text=True)
+        if out.returncode:
+            return None
+        elapsed, *loaded = out.stdout.split()
+        timings.append(float(elapsed))
+    return {'ms': np.median(timings)*1e3, 'loaded': loaded}
+
+
+def run(label, source, tmp, repeat, seed=0):
+    cache_dir = tmp/f"cache-{label}"
+    results = {}
+    results['__init__ (xlsx)'] = measure(lambda i: HSCorrelations(source, cache_dir=cache_dir, refresh=True), 1)
+    results['__init__ (cache)'] = measure(lambda i: HSCorrelations(source, cache_dir=cache_dir), max(repeat//20, 3))
+    with contextlib.redirect_stdout(io.StringIO()):
+        hs = HSCorrelations(source, cache_dir=cache_dir, descriptions_dir=tmp/f"descriptions-{label}")
+    write_descriptions(tmp/f"descriptions-{label}", hs, seed)
+
+    df = hs.get_df()
+    rng = np.random.default_rng(seed)
+    # positions present in the first and last versions, so every method has a series to work on
+    both = np.intersect1d(df['HS92'].astype(str).unique(), df['HS17'].astype(str).unique())
+    positions = rng.choice(both, repeat).tolist()
+    names = rng.choice(WORDS, repeat).tolist()
+
+    results['check_position'] = measure(lambda i: hs.check_position(positions[i]), repeat)
+    results['find_homogeneous_serie'] = measure(lambda i: hs.find_homogeneous_serie(positions[i], 1992), repeat)
+    results['trade_off2'] = measure(lambda i: hs.trade_off2(positions[i], 1992), repeat)
+    results['filter_df'] = measure(lambda i: hs.filter_df(positions[i:i+20], 2012), repeat)
+    try:
+        import plotly  # noqa: F401
+        results['genSankey2'] = measure(lambda i: hs.genSankey2(positions[i], 2002), max(repeat//10, 3))
+    except ImportError:
+        print("plotly is not installed, skipping genSankey2")
+    results['search_positions'] = measure(lambda i: hs.search_positions(names[i]), repeat)
+    with mock.patch('builtins.input', side_effect=lambda *a: next(answers)):
+        answers = itertools.cycle(sum([[n, "1992", "2017"] for n in names], []))
+        results['search_position_by_name'] = measure(lambda i: hs.search_position_by_name(), repeat)
+    return results
+
+
+def report(label, results):
+    print(f"\n{label}")
+    print(f"{'operation':<26}{'calls':>7}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KiB':>11}")
+    for name, r in results.items():
+        print(f"{name:<26}{r['calls']:>7}{r['ops_per_s']:>12.1f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}"
+              f"{r['p99_ms']:>10.3f}{r['peak_kb']:>11.1f}")
+
+
+def report_imports(results):
+    print("\nimport time (fresh interpreter, median)")
+    print(f"{'module':<26}{'ms':>10}  optional dependencies loaded")
+    for module, r in results.items():
+        if r is None:
+            print(f"{module:<26}{'-':>10}  not installed")
+        else:
+            print(f"{module:<26}{r['ms']:>10.1f}  {', '.join(r['loaded']) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=4, help="size of the synthetic table relative to the bundled one")
+    parser.add_argument('--repeat', type=int, default=200, help="calls per operation")
+    parser.add_argument('--imports', type=int, default=5, help="fresh interpreters per import timing")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    all_results = {'imports': {m: import_time(m, args.imports) for m in ['numpy', 'pandas', 'HSCorrelations']+OPTIONAL}}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        all_results['bundled'] = run('bundled', str(DATA), tmp, args.repeat, args.seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            n_rows = len(HSCorrelations(str(DATA), cache_dir=tmp/"cache-bundled").get_df())*args.scale
+        synthetic = tmp/"synthetic.xlsx"
+        synthetic_table(n_rows, args.seed).to_excel(synthetic, index=False)
+        all_results[f'synthetic x{args.scale}'] = run('synthetic', str(synthetic), tmp, args.repeat, args.seed)
+    report_imports(all_results['imports'])
+    for label, results in all_results.items():
+        if label!='imports':
+            report(label, results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(all_results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
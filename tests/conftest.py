@@ -0,0 +1,96 @@
+import functools
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent/"notebooks"))
+
+from HSCorrelations import HSCorrelations  # noqa: E402
+
+VERSIONS = ['HS92', 'HS96', 'HS02', 'HS07', 'HS12', 'HS17']
+# 010110 is kept in every version, 020110 splits in HS07, 030110 and 030120 merge in HS12,
+# 040110 is renamed in HS02, 050120 merges into 050110 in HS12, 060110 only exists in HS92
+# and 999999 is the highest code a position can have
+ROWS = [
+    ['010110', '010110', '010110', '010110', '010110', '010110'],
+    ['020110', '020110', '020110', '020111', '020111', '020111'],
+    ['020110', '020110', '020110', '020112', '020112', '020112'],
+    ['030110', '030110', '030110', '030110', '030100', '030100'],
+    ['030120', '030120', '030120', '030120', '030100', '030100'],
+    ['040110', '040110', '040190', '040190', '040190', '040190'],
+    ['050110', '050110', '050110', '050110', '050110', '050110'],
+    ['050120', '050120', '050120', '050120', '050110', '050110'],
+    ['060110', '060190', '060190', '060190', '060190', '060190'],
+    ['999999', '999999', '999999', '999999', '999999', '999999'],
+]
+
+
+@pytest.fixture(scope="session")
+def table(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data")/"correlations.xlsx"
+    pd.DataFrame(ROWS, columns=VERSIONS).to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture
+def hs(table, tmp_path):
+    return HSCorrelations(str(table), cache_dir=tmp_path/"cache")
+
+
+# conversion workbooks laid out like the UNSTATS ones: a notes sheet, then a title row above
+# the two "HS <year>" headers of the conversion sheet
+CONVERSIONS = {(2012, 2017): [['010110', '010110'], ['030110', '030100'], ['030120', '030100']],
+               (2017, 2012): [['010110', '010110'], ['030100', '030110'], ['030100', '030120']]}
+
+
+@pytest.fixture(scope="session")
+def unstats(tmp_path_factory):
+    """Directory that stands in for the UNSTATS classifications page and its tables."""
+    root = tmp_path_factory.mktemp("unstats")
+    (root/"tables").mkdir()
+    links = []
+    for (a, b), rows in CONVERSIONS.items():
+        name = f"tables/HS{a}toHS{b} Conversion.xlsx"
+        with pd.ExcelWriter(root/name) as writer:
+            pd.DataFrame([["notes"]]).to_excel(writer, sheet_name="Notes", header=False, index=False)
+            sheet = [[f"Conversion HS{a} to HS{b}", None], [f"HS {a}", f"HS {b}"]]+[[int(x), int(y)] for x, y in rows]
+            pd.DataFrame(sheet).to_excel(writer, sheet_name="Conversion Table", header=False, index=False)
+        links.append(f'<a href="{name}">{a} to {b}</a>')
+    (root/"correspondence-tables.asp").write_text(f"<html><body>{''.join(links)}<a href=\"other.pdf\">notes</a></body></html>")
+    return root
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class _Servers:
+    """Serves directories over HTTP on localhost, one server per call."""
+
+    def __init__(self):
+        self.servers = {}
+
+    def __call__(self, directory):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(directory)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/"
+        self.servers[url] = server
+        return url
+
+    def stop(self, url):
+        server = self.servers.pop(url)
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def serve():
+    servers = _Servers()
+    yield servers
+    for url in list(servers.servers):
+        servers.stop(url)
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+# 010110 splits, 040190 and 050110 merge, every other code is carried over
+CONVERSION = pd.DataFrame({'HS17': ['010110', '010110', '040190', '050110'],
+                           'HS22': ['010111', '010112', '040100', '040100']})
+
+
+def test_conversion_table_extends_the_table(hs):
+    rows = len(hs.get_df())
+    changed = hs.add_version('HS22', 2022, CONVERSION)
+    assert list(hs.get_versions())[-1] == 'HS22'
+    assert len(hs.get_df()) == rows+1
+    assert hs.year_to_HS(2022) == ['HS22']
+    assert hs.versions_of('010112') == ['HS22']
+    assert hs.versions_of('040190') == ['HS02', 'HS07', 'HS12', 'HS17']
+    split = changed[changed.HS17.apply(lambda c: c == ['010110'])].iloc[0]
+    assert (split.HS22, split.one_to_one, split.merged) == (['010111', '010112'], False, False)
+    merged = changed[changed.merged]
+    assert sorted(sum(merged.HS17, [])) == ['040190', '050110']
+
+
+def test_series_span_the_new_version(hs):
+    hs.add_version('HS22', 2022, CONVERSION)
+    series = hs.find_homogeneous_serie('040100')
+    assert {'HS92-040110', 'HS17-050110', 'HS22-040100'} <= set(series)
+    assert hs.find_homogeneous_serie('010110', 2017, 2022) == ['HS17-010110', 'HS22-010111', 'HS22-010112']
+    assert hs.find_homogeneous_serie('999999', 1992, 2022)[-1] == 'HS96-999999'
+
+
+def test_codes_for_every_row(hs):
+    codes = hs.get_df()['HS17'].astype(str).tolist()
+    hs.add_version('HS22', 2022, codes)
+    window = hs.get_no_loss_windows(2017, 2022)
+    assert (window.no_loss_to == 'HS22').all()
+    with pytest.raises(ValueError):
+        hs.add_version('HS27', 2027, codes[:-1])
+    with pytest.raises(ValueError):
+        hs.add_version('HS22', 2022, codes)
+
+
+def test_new_version_in_sankey_and_descriptions(hs, caplog):
+    hs.add_version('HS22', 2022, CONVERSION)
+    sankey = hs.genSankey('010110', 1992, 2022)
+    node = sankey['data'][0]['node']
+    assert len(node['color']) == len(node['label'])
+    assert node['color'][node['label'].index('HS22-010112')]
+    assert hs.position_to_desc('010112', 'HS22') is None
+    assert "No Comtrade descriptions for HS22" in caplog.text
+
+
+def test_long_version_names(hs):
+    hs.add_version('HS2022', 2022, CONVERSION)
+    node = hs.genSankey('010110', 1992)['data'][0]['node']
+    assert 'HS2022-010111' in node['label'] and len(node['color']) == len(node['label'])
+
+
+def test_cached_precision_loss_gains_the_new_column(hs):
+    before = hs.precision_loss([(1992, 2017)])
+    assert 'HS22' not in before
+    hs.add_version('HS22', 2022, CONVERSION)
+    after = hs.precision_loss([(1992, 2017)])
+    assert (after.HS22 == 0).all()
+    assert after.drop(columns='HS22').equals(before)
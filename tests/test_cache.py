@@ -0,0 +1,35 @@
+import multiprocessing
+
+import numpy as np
+
+from HSCorrelations import HSCorrelations
+
+
+def start(args):
+    table, cache_dir = args
+    return len(HSCorrelations(table, cache_dir=cache_dir, refresh=True).get_df())
+
+
+def test_concurrent_writers_share_one_cache(table, tmp_path):
+    cache_dir = tmp_path/"cache"
+    with multiprocessing.get_context("fork").Pool(6) as pool:
+        rows = pool.map(start, [(str(table), cache_dir)]*12)
+    assert [f.suffix for f in cache_dir.iterdir()] == ['.npz']
+    assert rows == [len(HSCorrelations(str(table), cache_dir=cache_dir).get_df())]*12
+
+
+def test_unwritable_cache_dir(table, tmp_path):
+    not_a_directory = tmp_path/"file"
+    not_a_directory.write_text("")
+    hs = HSCorrelations(str(table), cache_dir=not_a_directory)
+    assert hs.check_position('010110')
+
+
+def test_conversion_tables_are_written_whole(table, unstats, tmp_path):
+    hs = HSCorrelations(str(table), cache_dir=tmp_path/"cache", conversion_source=str(unstats)+"/")
+    hs.prefetch_conversion_tables()
+    files = list((tmp_path/"cache"/"conversions").iterdir())
+    assert len(files) == 2 and all(f.suffix == '.npz' for f in files)
+    for f in files:
+        with np.load(f) as npz:
+            assert npz['codes'].shape == (3, 2)
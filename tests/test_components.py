@@ -0,0 +1,91 @@
+import networkx as nx
+import pytest
+
+from benchmarks import synthetic_table
+from conftest import VERSIONS
+from HSCorrelations import HSCorrelations
+
+
+def test_invalid_positions_are_not_found(hs):
+    result = hs.find_homogeneous_series(['abc', '12345x', '999999'])
+    assert result.component.tolist()[:2] == [-1, -1]
+    assert result.version.isna().tolist() == [True, True, False]
+    assert result.component.iloc[2] >= 0
+
+
+def test_positions_are_matched_exactly(hs):
+    result = hs.find_homogeneous_series([' 010110', '010110 ', '10110', '0101101', '010110'])
+    assert result.component.tolist()[:4] == [-1]*4
+    assert result.position.tolist()[:4] == [' 010110', '010110 ', '10110', '0101101']
+    assert result.HS17.iloc[4] == ['010110']
+
+
+def test_headings_accept_longer_prefixes(hs):
+    result = hs.find_homogeneous_series(['0301', '030110', '03x1'], level=4)
+    assert result.position.tolist() == ['0301', '0301', '03x1']
+    assert result.component.iloc[0] == result.component.iloc[1] >= 0
+    assert result.component.iloc[2] == -1
+
+
+def test_no_loss_window_is_the_longest_of_the_period(hs):
+    # HS12-HS17 through the latest node, HS92-HS07 before 050120 is merged in
+    result = hs.find_homogeneous_series(['050110']).iloc[0]
+    assert (result.version, result.no_loss_from, result.no_loss_to) == ('HS17', 'HS92', 'HS07')
+
+
+@pytest.fixture(params=['fixture', 'synthetic'])
+def graph_case(request, table, tmp_path):
+    if request.param=='synthetic':
+        path = tmp_path/"synthetic.xlsx"
+        synthetic_table(600, seed=3).to_excel(path, index=False)
+        table = path
+    return HSCorrelations(str(table), cache_dir=tmp_path/"cache")
+
+
+def baseline_graph(df, versions):
+    # the networkx graph the original find_homogeneous_serie built
+    data = df[versions].astype(str).apply(lambda c: c.name+"-"+c.str.zfill(6))
+    graph = nx.Graph()
+    graph.add_nodes_from(data.to_numpy().ravel())
+    for a, b in zip(versions, versions[1:]):
+        graph.add_edges_from(data[[a, b]].drop_duplicates().itertuples(index=False, name=None))
+    return graph
+
+
+def baseline_window(graph, node, versions):
+    # follow links where both ends have a single neighbour on that side
+    def step(node, offset):
+        i = versions.index(node[:4])+offset
+        if not 0<=i<len(versions):
+            return None
+        ahead = [n for n in graph[node] if n[:4]==versions[i]]
+        back = [n for n in graph[ahead[0]] if n[:4]==node[:4]] if len(ahead)==1 else []
+        return ahead[0] if len(back)==1 else None
+    first = last = node
+    while step(first, -1):
+        first = step(first, -1)
+    while step(last, 1):
+        last = step(last, 1)
+    return first[:4], last[:4]
+
+
+@pytest.mark.parametrize('start, end', [(1992, 2017), (2002, 2012)])
+def test_components_and_windows_match_the_graph(graph_case, start, end):
+    versions = graph_case.year_to_HS(start, end)
+    graph = baseline_graph(graph_case.get_df(), versions)
+    for component in nx.connected_components(graph):
+        position = max(component)[5:]
+        assert graph_case.find_homogeneous_serie(position, start, end) == sorted(
+            nx.node_connected_component(graph, graph_case.versions_of(position, start, end)[-1]+"-"+position))
+    windows = graph_case.get_no_loss_windows(start, end)
+    for version, position, first, last in windows[['version', 'position', 'no_loss_from', 'no_loss_to']].itertuples(index=False):
+        assert baseline_window(graph, f"{version}-{position}", versions) == (first, last)
+
+
+def test_single_series_rejects_what_the_bulk_version_rejects(hs):
+    for position in ['0101101', '010110abc', ' 010110', '10110']:
+        assert hs.find_homogeneous_serie(position) is None
+        assert hs.find_homogeneous_series([position]).component.iloc[0] == -1
+    assert hs.find_homogeneous_serie('010110') == [f"{v}-010110" for v in sorted(VERSIONS)]
+    assert hs.find_homogeneous_serie('030110', level=4) == hs.find_homogeneous_serie('0301', level=4)
+    assert hs.find_homogeneous_serie('03011x', level=4) is None
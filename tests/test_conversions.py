@@ -0,0 +1,42 @@
+import pytest
+
+from HSCorrelations import HSCorrelations
+
+
+@pytest.fixture
+def local(table, unstats, tmp_path):
+    return HSCorrelations(str(table), cache_dir=tmp_path/"cache", conversion_source=str(unstats)+"/")
+
+
+def test_tables_follow_the_direction_of_the_pair(local):
+    forward = local.get_conversion_table(2012, 2017)
+    backward = local.get_conversion_table(2017, 2012)
+    assert forward.columns.tolist() == ['HS 2012', 'HS 2017']
+    assert backward.columns.tolist() == ['HS 2017', 'HS 2012']
+    assert forward.values.tolist() == [['010110', '010110'], ['030110', '030100'], ['030120', '030100']]
+    assert backward.values.tolist() == [['010110', '010110'], ['030100', '030110'], ['030100', '030120']]
+
+
+def test_missing_pair(local):
+    with pytest.raises(ValueError):
+        local.get_conversion_link(1992, 1996)
+
+
+def test_prefetch_caches_every_pair_on_disk(local, table, unstats, tmp_path):
+    assert sorted(local.prefetch_conversion_tables()) == [(2012, 2017), (2017, 2012)]
+    # a new instance reads the tables back from the cache
+    cached = HSCorrelations(str(table), cache_dir=tmp_path/"cache", conversion_source=str(unstats)+"/")
+    for pair in [(2012, 2017), (2017, 2012)]:
+        assert cached.get_conversion_table(*pair).equals(local.get_conversion_table(*pair))
+
+
+def test_conversion_lookup(local):
+    forward, backward = local.conversion_lookup(2012, 2017)
+    assert forward['030110'] == ['030100']
+    assert backward['030100'] == ['030110', '030120']
+
+
+def test_remote_source_matches_local(local, table, unstats, serve, tmp_path):
+    remote = HSCorrelations(str(table), cache_dir=tmp_path/"remote", conversion_source=serve(unstats))
+    for pair in [(2012, 2017), (2017, 2012)]:
+        assert remote.get_conversion_table(*pair).equals(local.get_conversion_table(*pair))
@@ -0,0 +1,43 @@
+import pytest
+import requests
+
+from HSCorrelations import Fetcher, Stats
+
+
+@pytest.fixture
+def files(tmp_path):
+    directory = tmp_path/"www"
+    directory.mkdir()
+    for i in range(4):
+        (directory/f"file{i}.json").write_text(f'{{"file": {i}}}')
+    return directory
+
+
+def test_get_and_get_many(files, serve, tmp_path):
+    base = serve(files)
+    fetcher = Fetcher(cache_dir=tmp_path/"http")
+    assert fetcher.get(base+"file0.json") == b'{"file": 0}'
+    assert fetcher.get_many([base+f"file{i}.json" for i in [3, 1, 2]]) == [b'{"file": 3}', b'{"file": 1}', b'{"file": 2}']
+
+
+def test_unchanged_files_are_served_from_the_cache(files, serve, tmp_path):
+    base = serve(files)
+    fetcher = Fetcher(cache_dir=tmp_path/"http", stats=Stats())
+    fetcher.get(base+"file0.json")
+    assert fetcher.get(base+"file0.json") == b'{"file": 0}'
+    assert fetcher.stats.counters == {'http.miss': 1, 'http.hit': 1}
+
+
+def test_cached_copy_is_used_when_offline(files, serve, tmp_path):
+    base = serve(files)
+    fetcher = Fetcher(cache_dir=tmp_path/"http", retries=0)
+    fetcher.get(base+"file0.json")
+    serve.stop(base)
+    assert fetcher.get(base+"file0.json") == b'{"file": 0}'
+    with pytest.raises(requests.ConnectionError):
+        fetcher.get(base+"file1.json")
+
+
+def test_missing_file_raises(files, serve, tmp_path):
+    with pytest.raises(requests.HTTPError):
+        Fetcher(cache_dir=tmp_path/"http", retries=0).get(serve(files)+"missing.json")
@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks import synthetic_table
+from HSCorrelations import CorrelationGraph, HSCorrelations
+
+
+@pytest.fixture(params=['fixture', 'synthetic'])
+def saved(request, table, tmp_path):
+    if request.param=='synthetic':
+        table = tmp_path/"synthetic.xlsx"
+        synthetic_table(600, seed=5).to_excel(table, index=False)
+    hs = HSCorrelations(str(table), cache_dir=tmp_path/"cache")
+    hs.save_graph(tmp_path/"graph")
+    return hs, CorrelationGraph(tmp_path/"graph")
+
+
+def test_components_match_find_homogeneous_serie(saved):
+    hs, graph = saved
+    for position in hs.get_codes('HS17').HS17:
+        assert graph.component('HS17', position) == hs.find_homogeneous_serie(position)
+
+
+@pytest.mark.parametrize('start, end', [(1992, 2002), (2007, 2017), (1996, 2012)])
+def test_restricted_components_match_the_window(saved, start, end):
+    hs, graph = saved
+    versions = hs.year_to_HS(start, end)
+    for position in hs.get_codes(versions[-1])[versions[-1]]:
+        assert graph.component(versions[-1], position, versions) == hs.find_homogeneous_serie(position, start, end)
+
+
+def test_unknown_nodes_and_versions_outside_the_window(saved):
+    hs, graph = saved
+    assert graph.component('HS17', '000000') is None
+    position = hs.get_codes('HS92').HS92.iloc[0]
+    assert graph.component('HS92', position, ['HS07', 'HS12']) is None
+    assert graph.neighbours('HS92', position)
@@ -0,0 +1,17 @@
+import logging
+
+from HSCorrelations import HSCorrelations
+
+
+def test_verbose_does_not_leak_to_quiet_instances(table, tmp_path, capsys):
+    HSCorrelations(str(table), cache_dir=tmp_path/"cache", verbose=True).trade_off2('010110', 1992)
+    assert "no precision loss" in capsys.readouterr().err
+    HSCorrelations(str(table), cache_dir=tmp_path/"cache").trade_off2('010110', 1992)
+    assert capsys.readouterr().err == ""
+    assert logging.getLogger("HSCorrelations").level == logging.NOTSET
+
+
+def test_quiet_instances_log_to_the_module_logger(table, tmp_path, caplog):
+    with caplog.at_level(logging.INFO, logger="HSCorrelations"):
+        HSCorrelations(str(table), cache_dir=tmp_path/"cache").trade_off2('010110', 1992)
+    assert any("no precision loss" in r.getMessage() for r in caplog.records)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def metrics(hs):
+    return hs.precision_loss([(1992, 2017)]).set_index(['version', 'position'])
+
+
+def test_split(metrics):
+    # 020110 in HS92-HS02, 020111 and 020112 from HS07
+    split = metrics.loc[[('HS02', '020110'), ('HS07', '020111'), ('HS17', '020112')]]
+    assert split.component.nunique() == 1
+    assert (split.component_size == 9).all() and (split.precision_loss == 3).all()
+    assert split[['HS92', 'HS07']].values.tolist() == [[1, 2]]*3
+    assert split.fan_in.tolist() == [1, 1, 1]
+    assert split.fan_out.tolist() == [2, 1, 0]
+    assert split.fan_ratio.iloc[0] == 0.5 and np.isnan(split.fan_ratio.iloc[2])
+
+
+def test_merge(metrics):
+    # 030110 and 030120 become 030100 in HS12
+    merge = metrics.loc[[('HS07', '030110'), ('HS07', '030120'), ('HS12', '030100')]]
+    assert merge.component.nunique() == 1
+    assert (merge.component_size == 10).all() and (merge.precision_loss == 4).all()
+    assert merge[['HS07', 'HS12']].values.tolist() == [[2, 1]]*3
+    assert merge.fan_in.tolist() == [1, 1, 2]
+    assert merge.fan_out.tolist() == [1, 1, 1]
+    assert merge.fan_ratio.tolist() == [1.0, 1.0, 2.0]
+
+
+def test_kept_code_has_no_loss(metrics):
+    kept = metrics.loc[('HS07', '010110')]
+    assert (kept.component_size, kept.precision_loss, kept.fan_in, kept.fan_out) == (6, 0, 1, 1)
+
+
+def test_windows_and_persistence(hs, tmp_path):
+    result = hs.precision_loss([(1992, 1996), (2012, 2017)])
+    assert result[['start_version', 'end_version']].drop_duplicates().values.tolist() == [['HS92', 'HS96'], ['HS12', 'HS17']]
+    assert (result[result.start_version == 'HS92'].HS17 == 0).all()
+    hs.save_precision_loss(tmp_path/"loss.csv", [(1992, 1996), (2012, 2017)])
+    loaded = hs.load_precision_loss(tmp_path/"loss.csv")
+    pd.testing.assert_frame_equal(loaded, result, check_dtype=False)
@@ -0,0 +1,19 @@
+import pandas as pd
+
+
+def test_workers_agree_in_window_then_position_order(hs):
+    positions = ['030100', 'abc', '010110', '020111', '999999']
+    windows = [(2007, 2017), (1992, 2002), (2012, 2012)]
+    serial = hs.resolve_all(positions, windows, workers=1, chunksize=2)
+    parallel = hs.resolve_all(positions, windows, workers=2, chunksize=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert list(zip(serial.start_version, serial.end_version)) == [
+        (a, b) for a, b in [('HS07', 'HS17'), ('HS92', 'HS02'), ('HS12', 'HS12')] for _ in positions]
+    assert serial.position.tolist() == positions*len(windows)
+
+
+def test_matches_find_homogeneous_series(hs):
+    result = hs.resolve_all(windows=[(1996, 2012)], workers=1)
+    expected = hs.find_homogeneous_series(result.position.tolist(), 1996, 2012)
+    pd.testing.assert_frame_equal(result.drop(columns=['start_version', 'end_version', 'HS92', 'HS17']), expected)
+    assert result.HS92.isna().all() and result.HS17.isna().all()
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from HSCorrelations import HSCorrelations, Stats
+
+TEXTS = {'010110': "Live horses, pure-bred breeding animals",
+         '020110': "Men's t-shirts of cotton",
+         '020111': "Men's shirts of cotton",
+         '020112': "T-shirts of cotton, other",
+         '030110': "Fish, frozen"}
+
+
+@pytest.fixture
+def searchable(table, tmp_path):
+    directory = tmp_path/"descriptions"
+    directory.mkdir()
+    for h in ['H0', 'H1', 'H2', 'H3', 'H4', 'H5']:
+        results = [{'id': code, 'text': f"{code} - {text}", 'parent': code[:4]} for code, text in TEXTS.items()]
+        with open(directory/f"classification{h}.json", 'w') as f:
+            json.dump({'results': results}, f)
+    return HSCorrelations(str(table), cache_dir=tmp_path/"cache", descriptions_dir=directory, stats=Stats())
+
+
+def test_every_token_of_a_word_is_required(searchable):
+    assert searchable.search_positions("t-shirts").id.tolist() == ['020110', '020112']
+    assert searchable.search_positions("men's t-shirts").id.tolist() == ['020110']
+
+
+def test_prefix_matches_the_last_token(searchable):
+    assert searchable.search_positions("live hor", prefix=True).id.tolist() == ['010110']
+
+
+def test_descriptions_are_read_once_per_version(searchable):
+    result = searchable.search_positions("cotton")
+    assert set(result.id) == {'020110', '020111', '020112'}
+    # once to build the index and once to read the texts of the hits
+    assert searchable.stats.counters['descriptions.hit'] == 2*6
+    assert 'descriptions.miss' not in searchable.stats.counters
+
+
+def test_interactive_search_matches_prefixes(searchable, monkeypatch, capsys):
+    answers = iter(["hor", "1992", "2017"])
+    monkeypatch.setattr('builtins.input', lambda *args: next(answers))
+    text, start, end = searchable.search_position_by_name()
+    assert "Live horses" in text and (start, end) == (1992, 2017)
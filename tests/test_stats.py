@@ -0,0 +1,57 @@
+import cProfile
+import json
+import threading
+
+from HSCorrelations import HSCorrelations, Stats
+
+
+class Recorder:
+    def __init__(self):
+        self.threads = []
+
+    def enable(self):
+        self.threads.append(('enable', threading.get_ident()))
+
+    def disable(self):
+        self.threads.append(('disable', threading.get_ident()))
+
+
+def test_methods_and_phases_are_timed(table, tmp_path):
+    stats = Stats()
+    hs = HSCorrelations(str(table), cache_dir=tmp_path/"cache", stats=stats)
+    hs.get_df()
+    hs.year_to_HS(1992)
+    hs.find_homogeneous_serie('020110')
+    hs.find_homogeneous_serie('020110')
+    exported = json.loads(stats.to_json())
+    assert {'load', 'index_build', 'graph_build', 'component_search', 'find_homogeneous_serie'} <= set(exported['timers'])
+    assert 'get_df' not in exported['timers'] and 'year_to_HS' not in exported['timers']
+    assert exported['timers']['find_homogeneous_serie']['calls'] == 2
+    assert exported['counters'] == {'correlations.miss': 1, 'components.miss': 1, 'components.hit': 1}
+
+
+def test_profiler_stays_on_the_thread_that_enabled_it():
+    stats = Stats(profiler=Recorder())
+
+    def fetch():
+        with stats.timer('fetch'):
+            pass
+
+    with stats.timer('outer'):
+        with stats.timer('inner'):
+            pass
+        workers = [threading.Thread(target=fetch) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    main = threading.get_ident()
+    assert stats.profiler.threads == [('enable', main), ('disable', main)]
+    assert stats.timers['fetch'][0] == 4
+
+
+def test_cprofile(table, tmp_path):
+    stats = Stats(profiler=cProfile.Profile())
+    hs = HSCorrelations(str(table), cache_dir=tmp_path/"cache", stats=stats)
+    hs.find_homogeneous_serie('020110')
+    assert stats.profiler.getstats()
@@ -0,0 +1,14 @@
+import pandas as pd
+
+
+def test_unknown_codes_stay_under_minus_one(hs, tmp_path):
+    source = tmp_path/"flows.csv"
+    pd.DataFrame({'code': ['abc', '999999', '020111', '020110'],
+                  'year': [2015, 2015, 2015, 1995],
+                  'value': [1.0, 2.0, 4.0, 8.0]}).to_csv(source, index=False)
+    result = hs.convert_trade_flows(source).set_index(['component', 'year'])['value']
+    series = hs.find_homogeneous_series(['999999', '020111']).set_index('position').component
+    assert result[-1, 2015] == 1.0
+    assert result[series['999999'], 2015] == 2.0
+    assert result[series['020111'], 2015] == 4.0
+    assert result[series['020111'], 1995] == 8.0
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+
+def test_single_old_version_ends_before_the_next_one(hs):
+    result = hs.trade_off2('060110', 1992)
+    assert (result.start, result.end, result.years) == ('HS92', 'HS92', "from 1992 to 1995")
+    assert result.precision_loss is False
+
+
+def test_windows_reaching_the_latest_version(hs):
+    result = hs.trade_off2('010110', 1992)
+    assert (result.start, result.end) == ('HS92', 'HS17')
+    assert result.years == f"from 1992 to {datetime.now().year}"
+    assert hs.trade_off2('040190', 1992).years == f"from 2002 to {datetime.now().year}"
+    assert hs.HS_to_years(['HS02', 'HS07']) == "from 2002 to 2007"